@@ -0,0 +1,10 @@
+"""Speed and memory benchmarks for xlsxcessive.
+
+Run the suite and save the results::
+
+    python -m benchmarks run --output before.json
+
+Compare two runs, flagging regressions beyond a threshold::
+
+    python -m benchmarks compare before.json after.json --threshold 10
+"""
@@ -0,0 +1,68 @@
+import argparse
+import sys
+
+from . import cases, harness
+
+
+def _run(args):
+    names = args.case or list(harness.cases)
+    unknown = set(names) - set(harness.cases)
+    if unknown:
+        sys.exit("Unknown cases: %s" % ', '.join(sorted(unknown)))
+    sizes = args.size or cases.DEFAULT_SIZES
+    results = harness.run(names, sizes, trace=args.trace)
+    if args.output:
+        harness.save(results, args.output)
+
+
+def _compare(args):
+    rows = harness.compare(
+        harness.load(args.before), harness.load(args.after), args.threshold
+    )
+    for name, size, metric, before, after, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(
+            '%-20s %10d %-28s %12.4g %12.4g %+8.1f%%%s'
+            % (name, size, metric, before, after, change, flag)
+        )
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the benchmarks")
+    run.add_argument('--case', action='append', help="a case to run (repeatable)")
+    run.add_argument(
+        '--size',
+        action='append',
+        type=int,
+        help="a number of cells (repeatable; default 10**4 to 10**6)",
+    )
+    run.add_argument(
+        '--trace',
+        action='store_true',
+        help="also measure peak Python allocations with tracemalloc",
+    )
+    run.add_argument('--output', help="save the results to this JSON file")
+    run.set_defaults(func=_run)
+
+    compare = commands.add_parser('compare', help="compare two saved runs")
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument(
+        '--threshold',
+        type=float,
+        default=10.0,
+        help="percent change counting as a regression (default 10)",
+    )
+    compare.set_defaults(func=_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
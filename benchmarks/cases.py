@@ -0,0 +1,181 @@
+"""The benchmark cases.
+
+Each case takes a number of cells and returns a dict of metrics. Metric
+names ending in _seconds or _bytes are better when lower, those ending in
+_per_sec when higher.
+"""
+
+import datetime
+import decimal
+import io
+
+from xlsxcessive import xlsx
+from xlsxcessive.workbook import Workbook
+
+from .harness import Timer, case
+
+COLUMNS = 20
+
+
+def _shape(size):
+    rows = max(1, size // COLUMNS)
+    return rows, min(size, COLUMNS)
+
+
+def _filled_sheet(size):
+    workbook = Workbook()
+    sheet = workbook.new_sheet('Data')
+    rows, cols = _shape(size)
+    for row in range(rows):
+        for col in range(cols):
+            sheet.cell(coords=(row, col), value=row * col + 0.5)
+    return workbook, sheet
+
+
+def _rates(seconds, size, prefix=''):
+    return {
+        prefix + 'seconds': seconds,
+        prefix + 'cells_per_sec': size / seconds if seconds else None,
+    }
+
+
+@case
+def worksheet_cell(size):
+    """Cells created one at a time through Worksheet.cell."""
+    sheet = Workbook().new_sheet('Data')
+    rows, cols = _shape(size)
+    with Timer() as timer:
+        for row in range(rows):
+            for col in range(cols):
+                sheet.cell(coords=(row, col), value=row * col)
+    return _rates(timer.seconds, rows * cols)
+
+
+@case
+def row_cell(size):
+    """Cells created by reference through Row.cell."""
+    sheet = Workbook().new_sheet('Data')
+    rows, cols = _shape(size)
+    names = [chr(65 + col % 26) * (col // 26 + 1) for col in range(cols)]
+    with Timer() as timer:
+        for row in range(rows):
+            current = sheet.row(row + 1)
+            suffix = str(row + 1)
+            for name in names:
+                current.cell(name + suffix, value='text')
+    return _rates(timer.seconds, rows * cols)
+
+
+@case
+def append_rows(size):
+    """Tabular data added through Worksheet.append_rows."""
+    sheet = Workbook().new_sheet('Data')
+    rows, cols = _shape(size)
+    data = [[row * col + 0.5 for col in range(cols)] for row in range(rows)]
+    with Timer() as timer:
+        sheet.append_rows(data)
+    return _rates(timer.seconds, rows * cols)
+
+
+@case
+def cell_values(size):
+    """Values of the common types assigned to existing cells."""
+    sheet = Workbook().new_sheet('Data')
+    rows, cols = _shape(size)
+    cells = [
+        sheet.cell(coords=(row, col)) for row in range(rows) for col in range(cols)
+    ]
+    values = [
+        7,
+        2.5,
+        decimal.Decimal('1.25'),
+        'text',
+        datetime.date(2024, 1, 2),
+        datetime.datetime(2024, 1, 2, 3, 4, 5),
+        datetime.time(12, 30),
+        None,
+    ]
+    with Timer() as timer:
+        for number, cell in enumerate(cells):
+            cell.value = values[number % len(values)]
+    return _rates(timer.seconds, len(cells))
+
+
+@case
+def render(size):
+    """Rendering a filled Worksheet to XML."""
+    workbook, sheet = _filled_sheet(size)
+    with Timer() as timer:
+        xml = str(sheet)
+    metrics = _rates(timer.seconds, size)
+    metrics['xml_bytes'] = len(xml.encode('utf-8'))
+    return metrics
+
+
+@case
+def stylesheet_growth(size):
+    """One format per 100 cells, each with its own font and number format."""
+    workbook = Workbook()
+    stylesheet = workbook.stylesheet
+    count = max(1, size // 100)
+    with Timer() as timer:
+        for number in range(count):
+            fmt = stylesheet.new_format()
+            fmt.font(size=8 + number % 20, bold=bool(number % 2))
+            fmt.number_format('0.%s' % ('0' * (number % 10 + 1)))
+        xml = str(stylesheet)
+    return {
+        'seconds': timer.seconds,
+        'formats_per_sec': count / timer.seconds if timer.seconds else None,
+        'styles_xml_bytes': len(xml.encode('utf-8')),
+    }
+
+
+@case
+def shared_formulas(size):
+    """A column of values, each summed by a cell sharing a formula."""
+    sheet = Workbook().new_sheet('Data')
+    rows = max(1, size // 2)
+    with Timer() as build:
+        formula = sheet.formula('A1*2', shared=True)
+        for row in range(rows):
+            sheet.cell(coords=(row, 0), value=row)
+            sheet.cell(coords=(row, 1), value=formula)
+    with Timer() as render:
+        str(sheet)
+    metrics = _rates(build.seconds, rows * 2, 'build_')
+    metrics.update(_rates(render.seconds, rows * 2, 'render_'))
+    return metrics
+
+
+@case
+def fill_formula(size):
+    """A column of values next to a shared formula filled down at once."""
+    sheet = Workbook().new_sheet('Data')
+    rows = max(1, size // 2)
+    sheet.append_rows([row] for row in range(rows))
+    with Timer() as build:
+        sheet.fill_formula('A1*2', 'B1:B%d' % rows)
+    with Timer() as render:
+        str(sheet)
+    metrics = _rates(build.seconds, rows, 'build_')
+    metrics.update(_rates(render.seconds, rows * 2, 'render_'))
+    return metrics
+
+
+@case
+def save(size):
+    """Building a workbook and saving it with xlsx.save."""
+    with Timer() as build:
+        workbook, sheet = _filled_sheet(size)
+    output = io.BytesIO()
+    with Timer() as timer:
+        xlsx.save(workbook, 'benchmark.xlsx', output)
+    metrics = _rates(build.seconds, size, 'build_')
+    metrics.update(_rates(timer.seconds, size, 'save_'))
+    metrics['xlsx_bytes'] = len(output.getvalue())
+    return metrics
+
+
+# 10**4 to 10**6 cells; pass --size 10000000 for the largest sheets
+DEFAULT_SIZES = [10**exponent for exponent in range(4, 7)]
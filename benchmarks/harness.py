@@ -0,0 +1,177 @@
+"""Running benchmark cases and comparing their results."""
+
+import datetime
+import gc
+import importlib
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# name -> function of the number of cells, returning a dict of metrics
+cases = {}
+
+
+def case(func):
+    """Register a benchmark case."""
+    cases[func.__name__] = func
+    return func
+
+
+class Timer:
+    """Measures the wall clock time of the with blocks it's used in."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds += time.perf_counter() - self.start
+
+
+def peak_rss():
+    """The peak resident set size of this process in bytes, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _run_case(name, size, trace):
+    # Register the cases in this (spawned) process.
+    importlib.import_module('.cases', __package__)
+
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    metrics = cases[name](size)
+    if trace:
+        metrics['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    metrics['peak_rss_bytes'] = peak_rss()
+    return metrics
+
+
+def run_case(name, size, trace=False):
+    """Run a case in a fresh process, so its peak RSS is its own.
+
+    With trace, the peak of the memory allocated by Python is measured as
+    well, which slows the case down; time and memory are best measured in
+    separate runs.
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(_run_case, (name, size, trace))
+
+
+def metadata():
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def run(names, sizes, trace=False, log=print):
+    results = []
+    for name in names:
+        for size in sizes:
+            metrics = run_case(name, size, trace)
+            log('%-28s %10d  %s' % (name, size, _summary(metrics)))
+            results.append({'name': name, 'size': size, 'metrics': metrics})
+    return {'meta': metadata(), 'results': results}
+
+
+def _summary(metrics):
+    return '  '.join(
+        '%s=%s' % (key, _format(value))
+        for key, value in metrics.items()
+        if value is not None
+    )
+
+
+def _format(value):
+    if isinstance(value, float):
+        return '%.4g' % value
+    return str(value)
+
+
+def save(results, filename):
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+
+
+def load(filename):
+    with open(filename, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _in_units(metric, *units):
+    """Whether metric is one of units, or ends with one of them."""
+    return metric in units or metric.endswith(tuple('_' + unit for unit in units))
+
+
+def _lower_is_better(metric):
+    return _in_units(metric, 'seconds', 'bytes')
+
+
+def _higher_is_better(metric):
+    return _in_units(metric, 'per_sec')
+
+
+def compare(before, after, threshold=10.0):
+    """Compare the metrics of two runs.
+
+    Returns a list of (name, size, metric, before, after, change in percent,
+    regressed) for the metrics present in both. A metric regresses when it
+    gets worse by more than threshold percent.
+    """
+    previous = {(r['name'], r['size']): r['metrics'] for r in before['results']}
+    rows = []
+    for result in after['results']:
+        old = previous.get((result['name'], result['size']))
+        if old is None:
+            continue
+        for metric, value in result['metrics'].items():
+            base = old.get(metric)
+            if not base or value is None:
+                continue
+            change = (value - base) / base * 100
+            if _lower_is_better(metric):
+                regressed = change > threshold
+            elif _higher_is_better(metric):
+                regressed = -change > threshold
+            else:
+                regressed = False
+            rows.append((
+                result['name'],
+                result['size'],
+                metric,
+                base,
+                value,
+                change,
+                regressed,
+            ))
+    return rows
@@ -0,0 +1,75 @@
+import asyncio
+import io
+import threading
+import zipfile
+
+import pytest
+
+from xlsxcessive import aio, workbook
+
+
+def _workbook(rows=2000):
+    wb = workbook.Workbook()
+    sheet = wb.new_sheet('Data')
+    sheet.append_rows([
+        [number, 'row %d' % number, number / 7] for number in range(rows)
+    ])
+    return wb
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestSaveStream:
+    def test_chunks_form_the_saved_package(self):
+        wb = _workbook()
+        chunks = asyncio.run(_collect(aio.save_stream(wb, chunk_size=4096)))
+        assert all(len(chunk) == 4096 for chunk in chunks[:-1])
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        assert archive.read('worksheet1.xml').decode() == str(wb.sheets[0])
+
+    def test_save_params_are_passed_on(self):
+        stream = aio.save_stream(_workbook(), compression=zipfile.ZIP_STORED)
+        data = b''.join(asyncio.run(_collect(stream)))
+        info = zipfile.ZipFile(io.BytesIO(data)).getinfo('worksheet1.xml')
+        assert info.compress_size == info.file_size
+
+    def test_event_loop_keeps_running(self):
+        async def run():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def tick():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            ticker = asyncio.create_task(tick())
+            await _collect(aio.save_stream(_workbook(20000), chunk_size=1024))
+            done.set()
+            await ticker
+            return ticks
+
+        assert asyncio.run(run()) > 10
+
+    def test_abandoned_stream_stops_the_save(self):
+        async def run():
+            stream = aio.save_stream(_workbook(20000), chunk_size=1024, max_pending=1)
+            async for chunk in stream:
+                break
+            await stream.aclose()
+
+        asyncio.run(run())
+        for thread in threading.enumerate():
+            if thread.name == 'xlsxcessive-save':
+                thread.join(timeout=5)
+                assert not thread.is_alive()
+
+    def test_errors_are_raised_in_the_consumer(self):
+        wb = _workbook()
+        wb.sheets[0].cell('A1', value=1)
+        wb.sheets[0].row(1).cells.append(None)
+        with pytest.raises(AttributeError):
+            asyncio.run(_collect(aio.save_stream(wb)))
@@ -1,11 +1,22 @@
 """Smoke tests for xlsxcessive."""
 
+import concurrent.futures
 import io
+import threading
+import zipfile
 
-from xlsxcessive import workbook, xlsx
+import pytest
+
+from xlsxcessive import stats, workbook, xlsx
 from xlsxcessive.worksheet import Cell
 
 
+def _local_version(output, info):
+    # The version needed to extract, from the local header of the entry
+    start = info.header_offset + 4
+    return int.from_bytes(output.getvalue()[start : start + 2], 'little')
+
+
 class TestWhenSaving:
     def test_fairly_involved_save(self):
         wb = workbook.Workbook()
@@ -80,3 +91,264 @@ class TestWhenSaving:
 
         # something should now be in the StringIO object
         assert output.getvalue()
+
+    def test_streaming_sheet_save(self):
+        wb = workbook.Workbook()
+        sheet = wb.new_sheet('Streamed', streaming=True)
+        sheet.col(number=1, width=20)
+        for number in range(1, 1001):
+            sheet.row(number).cell('A%d' % number, value=number)
+
+        output = io.BytesIO()
+        xlsx.save(wb, 'streamed.xlsx', output)
+
+        with zipfile.ZipFile(output) as archive:
+            assert archive.read('worksheet1.xml').decode('utf-8') == str(sheet)
+        sheet.close()
+
+    def test_spilling_sheet_save(self):
+        wb = workbook.Workbook()
+        sheets = [wb.new_sheet('Spilled %d' % i, spill_rows=100) for i in range(2)]
+        for sheet in sheets:
+            for number in range(1000, 0, -1):
+                sheet.row(number).cell('A%d' % number, value=number)
+
+        output = io.BytesIO()
+        try:
+            # the worker processes read the spilled rows too
+            xlsx.save(wb, 'spilled.xlsx', output, workers=2)
+            with zipfile.ZipFile(output) as archive:
+                assert archive.read('worksheet1.xml').decode() == str(sheets[0])
+                assert archive.read('worksheet2.xml').decode() == str(sheets[1])
+        finally:
+            for sheet in sheets:
+                sheet.close()
+
+    @pytest.mark.parametrize('workers', [None, 2])
+    def test_only_streamed_sheets_use_zip64(self, workers):
+        wb = workbook.Workbook()
+        for name in ('First', 'Second'):
+            wb.new_sheet(name).cell('A1', value=name)
+        streamed = wb.new_sheet('Streamed', streaming=True)
+        streamed.row(1).cell('A1', value=1)
+
+        output = io.BytesIO()
+        try:
+            xlsx.save(wb, 'zip64.xlsx', output, workers=workers, pool='thread')
+        finally:
+            streamed.close()
+
+        with zipfile.ZipFile(output) as archive:
+            versions = {
+                info.filename: (info.extract_version, _local_version(output, info))
+                for info in archive.infolist()
+            }
+        assert versions['worksheet1.xml'] == (20, 20)
+        assert versions['worksheet2.xml'] == (20, 20)
+        assert versions['worksheet3.xml'] == (45, 45)
+
+    def test_parts_match_rendered_xml(self):
+        wb = workbook.Workbook()
+        sheet = wb.new_sheet('Data')
+        for number in range(1, 101):
+            sheet.cell('A%d' % number, value='row %d' % number)
+            sheet.cell('B%d' % number, value=number)
+        expected = str(sheet)
+
+        output = io.BytesIO()
+        xlsx.save(wb, 'data.xlsx', output)
+
+        with zipfile.ZipFile(output) as archive:
+            assert archive.read('workbook.xml').decode('utf-8') == str(wb)
+            assert archive.read('styles.xml').decode('utf-8') == str(wb.stylesheet)
+            assert archive.read('worksheet1.xml').decode('utf-8') == expected
+
+    def test_shared_strings_save(self):
+        wb = workbook.Workbook(shared_strings=True)
+        sheet = wb.new_sheet('Statuses')
+        for number in range(1, 101):
+            sheet.cell('A%d' % number, value='Completed' if number % 2 else 'Open')
+
+        output = io.BytesIO()
+        xlsx.save(wb, 'statuses.xlsx', output)
+
+        with zipfile.ZipFile(output) as archive:
+            assert archive.read('sharedStrings.xml').decode() == str(wb.shared_strings)
+            rels = archive.read('_rels/workbook.xml.rels').decode()
+            assert 'Target="sharedStrings.xml"' in rels
+
+
+class TestParallelSave:
+    def _workbook(self):
+        wb = workbook.Workbook()
+        money = wb.stylesheet.new_format()
+        money.number_format('#,##0.00')
+        for region in range(4):
+            sheet = wb.new_sheet('Region %d' % region)
+            for number in range(1, 201):
+                sheet.cell('A%d' % number, value='item %d' % number)
+                sheet.cell('B%d' % number, value=number * region, format=money)
+        streamed = wb.new_sheet('Streamed', streaming=True)
+        for number in range(1, 51):
+            streamed.row(number).cell('A%d' % number, value=number)
+        return wb
+
+    def _contents(self, **params):
+        wb = self._workbook()
+        output = io.BytesIO()
+        try:
+            xlsx.save(wb, 'regions.xlsx', output, **params)
+        finally:
+            wb.sheets[-1].close()
+        with zipfile.ZipFile(output) as archive:
+            return [(info.filename, archive.read(info)) for info in archive.infolist()]
+
+    def test_process_pool_output_matches_serial_output(self):
+        assert self._contents(workers=3) == self._contents()
+
+    def test_thread_pool_output_matches_serial_output(self):
+        assert self._contents(workers=2, pool='thread') == self._contents()
+
+    def test_rejects_unknown_pools(self):
+        with pytest.raises(ValueError):
+            self._contents(workers=2, pool='cluster')
+
+    def test_processes_are_not_forked_from_threads(self):
+        wb = self._workbook()
+        executors = []
+
+        def render():
+            with xlsx._SheetRenderer(wb, 2, 'process') as renderer:
+                executors.append(renderer.executor)
+
+        thread = threading.Thread(target=render)
+        thread.start()
+        thread.join()
+        wb.sheets[-1].close()
+        assert isinstance(executors[0], concurrent.futures.ThreadPoolExecutor)
+
+
+class TestCompressionOptions:
+    def _save(self, **params):
+        wb = workbook.Workbook()
+        sheet = wb.new_sheet('Data')
+        sheet.append_rows([[number, 'row %d' % number] for number in range(2000)])
+        output = io.BytesIO()
+        xlsx.save(wb, 'data.xlsx', output, **params)
+        archive = zipfile.ZipFile(output)
+        assert archive.read('worksheet1.xml').decode() == str(sheet)
+        return archive.getinfo('worksheet1.xml')
+
+    def test_stored(self):
+        info = self._save(compression=zipfile.ZIP_STORED)
+        assert info.compress_size == info.file_size
+
+    def test_compresslevel_and_threads(self):
+        info = self._save(compresslevel=1, compress_threads=2)
+        assert info.compress_size < info.file_size
+
+
+class TestSaveStats:
+    def _workbook(self):
+        wb = workbook.Workbook()
+        sheet = wb.new_sheet('Data')
+        sheet.append_rows([[number, 'row %d' % number] for number in range(500)])
+        sheet.cell('C1', value=1)
+        return wb
+
+    def test_stats_are_collected(self):
+        collected = stats.SaveStats()
+        xlsx.save(self._workbook(), 'data.xlsx', io.BytesIO(), stats=collected)
+        for phase in ('count', 'package', 'workbook', 'styles', 'worksheet', 'zip'):
+            assert phase in collected.phases
+        data = collected.sheets['Data']
+        assert data['rows'] == 500
+        assert data['cells'] == {'number': 501, 'string': 500}
+        assert data['bytes'] > 0
+
+    def test_spilled_and_streamed_rows_are_counted(self):
+        wb = workbook.Workbook()
+        spilling = wb.new_sheet('Spilled', spill_rows=10)
+        streaming = wb.new_sheet('Streamed', streaming=True)
+        for sheet in (spilling, streaming):
+            sheet.append_rows([[number, 'row %d' % number] for number in range(40)])
+            for number in range(41, 51):
+                sheet.cell('A%d' % number, value=number)
+        collected = stats.SaveStats()
+        try:
+            xlsx.save(wb, 'data.xlsx', io.BytesIO(), stats=collected)
+        finally:
+            wb.close()
+        for name in ('Spilled', 'Streamed'):
+            data = collected.sheets[name]
+            assert data['rows'] == 50
+            assert data['cells'] == {'number': 50, 'string': 40}
+
+    def test_callback_gets_the_stats(self):
+        received = []
+        xlsx.save(self._workbook(), 'data.xlsx', io.BytesIO(), stats=received.append)
+        assert received[0].sheets['Data']['bytes'] > 0
+
+
+class TestCachedParts:
+    def setup_method(self, method):
+        self.wb = workbook.Workbook(shared_strings=True, cache_parts=True)
+        self.money = self.wb.stylesheet.new_format()
+        self.money.number_format('#,##0.00')
+        for region in range(3):
+            sheet = self.wb.new_sheet('Region %d' % region)
+            sheet.append_rows([['item %d' % n, n * region] for n in range(100)])
+            sheet.cell('C1', value=region, format=self.money)
+
+    def _save(self, **params):
+        """Return the reused worksheets and the parts of a save."""
+        output = io.BytesIO()
+        collected = stats.SaveStats()
+        xlsx.save(self.wb, 'regions.xlsx', output, stats=collected, **params)
+        reused = [name for name, info in collected.sheets.items() if 'reused' in info]
+        with zipfile.ZipFile(output) as archive:
+            return reused, {name: archive.read(name) for name in archive.namelist()}
+
+    def _uncached(self):
+        self.wb.cache_parts = False
+        try:
+            return self._save()[1]
+        finally:
+            self.wb.cache_parts = True
+
+    def test_unchanged_parts_are_reused(self):
+        assert self._save()[0] == []
+        reused, parts = self._save()
+        assert reused == ['Region 0', 'Region 1', 'Region 2']
+        assert parts == self._uncached()
+
+    def test_changed_sheets_are_rendered(self):
+        self._save()
+        self.wb.sheets[1].cell('D1', value='new')
+        reused, parts = self._save()
+        assert reused == ['Region 0', 'Region 2']
+        assert b'new' in parts['sharedStrings.xml']
+        assert parts == self._uncached()
+
+    def test_changed_cells_are_rendered(self):
+        cell = self.wb.sheets[2].row(1).cells[0]
+        self._save()
+        cell.value = 'changed'
+        assert self._save()[0] == ['Region 0', 'Region 1']
+
+    def test_changed_formats_render_every_sheet(self):
+        self._save()
+        self.money.font(bold=True)
+        reused, parts = self._save()
+        assert reused == []
+        assert parts == self._uncached()
+
+    def test_other_compression_settings_render_every_sheet(self):
+        self._save()
+        assert self._save(compresslevel=1)[0] == []
+        assert len(self._save(compresslevel=1)[0]) == 3
+
+    def test_parts_are_not_cached_by_default(self):
+        self.wb.cache_parts = False
+        self._save()
+        assert self._save()[0] == []
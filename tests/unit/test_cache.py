@@ -0,0 +1,58 @@
+from xlsxcessive import cache
+from xlsxcessive.cache import CacheDecorator
+from xlsxcessive.reference import _column_name_beyond, column_name
+
+
+class TestCacheDecorator:
+    def setup_method(self, method):
+        self.calls = []
+
+        @CacheDecorator(maxsize=3)
+        def square(n):
+            self.calls.append(n)
+            return n * n
+
+        self.square = square
+
+    def test_results_are_memoized(self):
+        assert [self.square(n) for n in (2, 2, 3)] == [4, 4, 9]
+        assert self.calls == [2, 3]
+        info = self.square.cache.info()
+        assert (info.hits, info.misses) == (1, 2)
+
+    def test_least_recently_used_results_are_evicted(self):
+        for n in (1, 2, 3, 1, 4):
+            self.square(n)
+        assert list(self.square.cache.cache) == [(3,), (1,), (4,)]
+        assert self.square.cache.info().evictions == 1
+
+    def test_resize_evicts_down_to_the_new_size(self):
+        for n in (1, 2, 3):
+            self.square(n)
+        self.square.cache.resize(1)
+        assert list(self.square.cache.cache) == [(3,)]
+        assert self.square.cache.info().maxsize == 1
+
+    def test_unbounded_cache(self):
+        self.square.cache.resize(None)
+        for n in range(10):
+            self.square(n)
+        assert self.square.cache.info().currsize == 10
+
+    def test_clear_resets_results_and_counters(self):
+        self.square(2)
+        self.square(2)
+        self.square.cache.clear()
+        assert self.square.cache.info() == (0, 0, 0, 3, 0)
+
+
+class TestRegistry:
+    def test_package_helpers_are_registered(self):
+        name = 'xlsxcessive.reference._column_name_beyond'
+        assert cache.registry[name] is _column_name_beyond.cache
+        assert name in cache.cache_info()
+
+    def test_clear_caches(self):
+        column_name(20000)
+        cache.clear_caches()
+        assert _column_name_beyond.cache.info().currsize == 0
@@ -1,4 +1,8 @@
 import datetime
+import decimal
+import fractions
+
+import pytest
 
 from xlsxcessive.worksheet import Cell
 from xlsxcessive.workbook import (
@@ -205,3 +209,50 @@ class TestCellDateTime:
     def test_time_conversion_23_59_59(self):
         c = Cell('A1', datetime.time(23, 59, 59))
         assert c.value == MIDNIGHT - ONE_SEC
+
+    # datetime conversion tests
+    def test_datetime_conversion_2006_2_1_noon(self):
+        c = Cell('A1', datetime.datetime(2006, 2, 1, 12, 0, 0))
+        assert c.value == 38749 + NOON
+
+    def test_datetime_conversion_2006_2_1_date1904(self):
+        wb = Workbook()
+        wb.date1904 = True
+        sheet = wb.new_sheet('Sheet 1')
+        c = sheet.cell('A1', value=datetime.datetime(2006, 2, 1, 12, 0, 0))
+        assert c.value == 37287 + NOON
+
+
+class TestCellColumnIndex:
+    def test_column_from_reference(self):
+        assert Cell('A7').column == 0
+        assert Cell('AB12').column == 27
+
+    def test_column_from_coords(self):
+        assert Cell(coords=(4, 16383)).column == 16383
+
+
+class TestCellValueTypes:
+    def test_common_types(self):
+        assert Cell('A1', 3).cell_type == 'n'
+        assert Cell('A1', True).cell_type == 'n'
+        assert Cell('A1', decimal.Decimal('1.5')).cell_type == 'n'
+        assert Cell('A1', 'a & b').value == 'a &amp; b'
+        assert Cell('A1', b'raw').cell_type == 'inlineStr'
+        assert Cell('A1', None).cell_type is None
+
+    def test_dates_are_serialized(self):
+        cell = Cell('A1', datetime.datetime(2006, 2, 1, 12))
+        assert (cell.cell_type, cell.value) == ('n', 38749.5)
+        assert cell._is_datetime and not cell._is_date
+
+    def test_other_types_are_dispatched_by_their_bases(self):
+        class Label(str):
+            pass
+
+        assert Cell('A1', fractions.Fraction(1, 2)).cell_type == 'n'
+        assert Cell('A1', Label('x')).cell_type == 'inlineStr'
+
+    def test_unsupported_values_are_refused(self):
+        with pytest.raises(ValueError):
+            Cell('A1', object())
@@ -0,0 +1,88 @@
+import datetime
+
+import pytest
+
+from xlsxcessive.dates import DateSerializer
+
+
+class TestDateSerializer:
+    def test_1900_dates(self):
+        dates = DateSerializer()
+        assert dates.date(datetime.date(1900, 1, 1)) == 1
+        assert dates.date(datetime.date(1900, 2, 28)) == 59
+        assert dates.date(datetime.date(1900, 3, 1)) == 61
+        assert dates.date(datetime.date(9999, 12, 31)) == 2958465
+
+    def test_1904_dates(self):
+        dates = DateSerializer(date1904=True)
+        assert dates.date(datetime.date(1904, 1, 1)) == 0
+        assert dates.date(datetime.date(2006, 2, 1)) == 37287
+
+    def test_datetimes(self):
+        dates = DateSerializer()
+        value = datetime.datetime(2006, 2, 1, 12, 0, 0)
+        assert dates.datetime(value) == 38749.5
+
+    def test_converters_by_type(self):
+        dates = DateSerializer()
+        values = [
+            datetime.date(2006, 2, 1),
+            datetime.datetime(2006, 2, 1, 12),
+            datetime.time(12),
+        ]
+        serials = [dates.converter(type(value))(value) for value in values]
+        assert serials == [38749, 38749.5, 0.5]
+
+    def test_converter_rejects_other_types(self):
+        with pytest.raises(TypeError):
+            DateSerializer().converter(int)
+
+    def test_converters_of_subclasses(self):
+        class Day(datetime.date):
+            pass
+
+        dates = DateSerializer()
+        assert dates.converter(Day) == dates.date
+        assert dates.converter(Day)(Day(2006, 2, 1)) == 38749
+
+
+class TestFromSerials:
+    @pytest.mark.parametrize('date1904', [False, True])
+    def test_round_trip(self, date1904):
+        dates = DateSerializer(date1904)
+        for value in [datetime.date(1904, 1, 1), datetime.date(9999, 12, 31)]:
+            assert dates.to_date(dates.date(value)) == value
+        value = datetime.datetime(2006, 2, 1, 23, 59, 59)
+        assert dates.to_datetime(dates.datetime(value)) == value
+        assert dates.to_time(dates.time(value)) == value.time()
+
+    def test_1900_leap_day(self):
+        dates = DateSerializer()
+        assert dates.to_date(59) == datetime.date(1900, 2, 28)
+        assert dates.to_date(60) == datetime.date(1900, 3, 1)
+        assert dates.to_date(61) == datetime.date(1900, 3, 1)
+        assert dates.to_date(1) == datetime.date(1900, 1, 1)
+
+
+class TestDatetime64:
+    def setup_method(self):
+        self.numpy = pytest.importorskip('numpy')
+
+    @pytest.mark.parametrize('date1904', [False, True])
+    def test_matches_per_value_conversion(self, date1904):
+        dates = DateSerializer(date1904)
+        values = [
+            datetime.datetime(1904, 1, 1),
+            datetime.datetime(1900, 2, 28, 23, 59, 59),
+            datetime.datetime(1900, 3, 1, 0, 0, 1),
+            datetime.datetime(2006, 2, 1, 10, 5, 54, 999),
+            datetime.datetime(9999, 12, 31, 23, 59, 59),
+        ]
+        array = self.numpy.array(values, dtype='datetime64[us]')
+        expected = [dates.datetime(value) for value in values]
+        assert dates.datetime64(array).tolist() == expected
+
+    def test_day_unit_gives_integer_serials(self):
+        dates = DateSerializer()
+        array = self.numpy.array(['1900-02-28', '2006-02-01'], dtype='datetime64[D]')
+        assert dates.datetime64(array).tolist() == [59, 38749]
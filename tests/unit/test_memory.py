@@ -0,0 +1,149 @@
+import pytest
+
+from xlsxcessive.errors import XlsxMemoryError
+from xlsxcessive.workbook import Workbook
+
+
+def _fill(sheet, rows=200):
+    for number in range(rows):
+        sheet.cell(coords=(number, 0), value='text %d' % number)
+        sheet.cell(coords=(number, 1), value=number * 1.5)
+
+
+class TestMemoryUsage:
+    def test_components_add_up(self):
+        workbook = Workbook(shared_strings=True)
+        _fill(workbook.new_sheet('Data'))
+        usage = workbook.memory_usage()
+        assert usage.rows > 0
+        assert usage.cells > 0
+        assert usage.styles > 0
+        assert usage.strings > 0
+        assert usage.total == sum(usage[:5])
+
+    def test_grows_with_cells(self):
+        workbook = Workbook()
+        sheet = workbook.new_sheet('Data')
+        _fill(sheet, 100)
+        before = workbook.memory_usage()
+        _fill(sheet, 1000)
+        after = workbook.memory_usage()
+        assert after.cells > before.cells * 5
+        assert after.rows > before.rows * 5
+
+    def test_formulas_are_counted(self):
+        workbook = Workbook()
+        sheet = workbook.new_sheet('Data')
+        before = workbook.memory_usage().formulas
+        sheet.formula('SUM(A1:A100)', shared=True)
+        assert workbook.memory_usage().formulas > before
+
+    def test_running_estimate_follows_a_deep_one(self):
+        workbook = Workbook(shared_strings=True)
+        sheet = workbook.new_sheet('Data')
+        _fill(sheet, 2000)
+        sheet.append_rows([['text', 1.5, 3]] * 2000)
+        sheet.formula('SUM(B1:B10)')
+        usage, deep = workbook.memory_usage(), workbook.memory_usage(deep=True)
+        for fast, measured in zip(usage, deep):
+            assert measured * 0.7 <= fast <= measured * 1.3
+
+    def test_running_estimate_drops_streamed_rows(self):
+        workbook = Workbook()
+        sheet = workbook.new_sheet('Data', streaming=True)
+        try:
+            _fill(sheet, 2000)
+            usage = workbook.memory_usage()
+            assert usage.rows + usage.cells < 1000
+        finally:
+            sheet.close()
+
+
+class TestMaxMemory:
+    def test_raises_when_exceeded(self):
+        workbook = Workbook(max_memory=50000)
+        sheet = workbook.new_sheet('Data')
+        with pytest.raises(XlsxMemoryError) as raised:
+            _fill(sheet, 1000)
+        assert raised.value.limit == 50000
+        assert raised.value.usage > 50000
+
+    def test_setting_a_limit_counts_existing_cells(self):
+        workbook = Workbook()
+        _fill(workbook.new_sheet('Data'), 1000)
+        with pytest.raises(XlsxMemoryError):
+            workbook.max_memory = 50000
+        workbook.max_memory = None
+        _fill(workbook.new_sheet('More'), 1000)
+
+    @pytest.mark.parametrize(
+        'rows',
+        [
+            [[1.5, 2.5, 3]] * 2000,
+            [['text', 1.5, None, 3]] * 2000,
+        ],
+    )
+    def test_estimate_tracks_appended_rows(self, rows):
+        workbook = Workbook(max_memory=10**9)
+        workbook.new_sheet('Data').append_rows(rows)
+        actual = workbook.memory_usage(deep=True).total
+        assert actual * 0.8 < workbook._memory_estimate < actual * 1.2
+
+    def test_estimate_tracks_cells(self):
+        workbook = Workbook(max_memory=10**9)
+        _fill(workbook.new_sheet('Data'), 2000)
+        actual = workbook.memory_usage(deep=True).total
+        assert actual * 0.8 < workbook._memory_estimate < actual * 1.2
+
+    def test_streaming_rows_are_released(self):
+        workbook = Workbook(max_memory=200000)
+        sheet = workbook.new_sheet('Data', streaming=True)
+        try:
+            _fill(sheet, 5000)
+            assert workbook._memory_estimate < 200000
+        finally:
+            sheet.close()
+
+    def test_streaming_releases_what_was_charged(self):
+        workbook = Workbook(max_memory=10**9)
+        start = workbook._memory_estimate
+        sheet = workbook.new_sheet('Data', streaming=True)
+        try:
+            _fill(sheet, 5000)
+            sheet.flush()
+            assert workbook._memory_estimate == start
+        finally:
+            sheet.close()
+
+    def test_unpacking_releases_the_store(self):
+        workbook = Workbook(max_memory=10**9)
+        start = workbook._memory_estimate
+        sheet = workbook.new_sheet('Data', streaming=True)
+        try:
+            sheet.append_rows([['text', 1.5, 3]] * 10)
+            for row in sheet.rows:
+                assert len(row.cells) == 3
+            sheet.flush()
+            assert workbook._memory_estimate == start
+        finally:
+            sheet.close()
+
+    def test_spilled_rows_are_released(self):
+        workbook = Workbook(max_memory=200000)
+        sheet = workbook.new_sheet('Data', spill_rows=100)
+        try:
+            _fill(sheet, 5000)
+            assert workbook._memory_estimate < 200000
+        finally:
+            sheet.close()
+
+    def test_spilling_releases_what_was_charged(self):
+        workbook = Workbook(max_memory=10**9)
+        start = workbook._memory_estimate
+        sheet = workbook.new_sheet('Data', spill_rows=100)
+        try:
+            _fill(sheet, 5000)
+            sheet.spill()
+            assert workbook._memory_estimate == start
+        finally:
+            sheet.close()
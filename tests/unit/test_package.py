@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+from xlsxcessive.package import Package
+from xlsxcessive.parts import StylesPart, WorkbookPart
+
+
+def _content(data):
+    def write(stream):
+        stream.write(data)
+
+    return write
+
+
+class TestPackage:
+    def setup_method(self):
+        self.package = Package()
+        self.workbook = self.package.add(WorkbookPart, '/workbook.xml', _content(b'wb'))
+        self.package.relate(self.workbook)
+        self.styles = self.package.add(StylesPart, '/styles.xml', _content(b'st'))
+        self.workbook.relate(self.styles, id='rId7')
+
+    def _save(self):
+        output = io.BytesIO()
+        self.package.save(output)
+        return zipfile.ZipFile(output)
+
+    def test_writes_parts(self):
+        archive = self._save()
+        assert archive.read('workbook.xml') == b'wb'
+        assert archive.read('styles.xml') == b'st'
+
+    def test_writes_content_types(self):
+        types = self._save().read('[Content_Types].xml').decode()
+        assert 'PartName="/styles.xml"' in types
+        assert StylesPart.content_type in types
+
+    def test_writes_relationships(self):
+        archive = self._save()
+        assert 'Target="workbook.xml"' in archive.read('_rels/.rels').decode()
+        rels = archive.read('_rels/workbook.xml.rels').decode()
+        assert 'Id="rId7"' in rels
+        assert 'Target="styles.xml"' in rels
+
+    def test_stream_can_be_decided_when_writing(self):
+        self.package.add(StylesPart, '/big.xml', _content(b'bg'), stream=lambda: True)
+        archive = self._save()
+        assert archive.getinfo('big.xml').extract_version == 45
+        assert archive.getinfo('styles.xml').extract_version == 20
@@ -0,0 +1,82 @@
+import datetime
+import io
+
+import pytest
+
+from xlsxcessive.reader import ReadCell, Reader, _date_kind
+from xlsxcessive.workbook import Workbook
+from xlsxcessive.xlsx import save
+
+
+def _saved(workbook):
+    stream = io.BytesIO()
+    save(workbook, None, stream=stream)
+    return stream
+
+
+def _values(reader, sheet=0):
+    rows = reader.rows(sheet)
+    return {cell.reference: cell.value for row in rows for cell in row.cells}
+
+
+class TestReader:
+    @pytest.mark.parametrize('shared_strings', [False, True])
+    def test_round_trip(self, shared_strings):
+        workbook = Workbook(shared_strings=shared_strings)
+        workbook.date1904 = shared_strings
+        sheet = workbook.new_sheet('Data')
+        sheet.cell('A1', value='AT&T <inc>')
+        sheet.cell('B1', value=42)
+        sheet.cell('C1', value=0.1)
+        sheet.cell('D1', value=datetime.date(2020, 1, 2))
+        sheet.cell('E1', value=datetime.datetime(2020, 1, 2, 3, 4, 5))
+        sheet.cell('F1', value=datetime.time(7, 8, 9))
+        sheet.append_rows([['packed', 1.5, datetime.date(1999, 12, 31)]])
+        with Reader(_saved(workbook)) as reader:
+            assert reader.date1904 is shared_strings
+            assert _values(reader, 'Data') == {
+                'A1': 'AT&T <inc>',
+                'B1': 42,
+                'C1': 0.1,
+                'D1': datetime.date(2020, 1, 2),
+                'E1': datetime.datetime(2020, 1, 2, 3, 4, 5),
+                'F1': datetime.time(7, 8, 9),
+                'A2': 'packed',
+                'B2': 1.5,
+                'C2': datetime.date(1999, 12, 31),
+            }
+
+    def test_formulas_and_styles(self):
+        workbook = Workbook()
+        sheet = workbook.new_sheet('Data')
+        money = workbook.stylesheet.new_format()
+        money.number_format('#,##0.00')
+        sheet.cell('A1', value=2.5, format=money)
+        shared = sheet.formula('A1*2', 5, shared=True)
+        sheet.cell('B1', value=shared)
+        sheet.cell('C1', value=shared)
+        with Reader(_saved(workbook)) as reader:
+            (row,) = reader.rows()
+        assert row.number == 1
+        assert row.cells == [
+            ReadCell('A1', 2.5, None, money.index),
+            ReadCell('B1', '5', 'A1*2', 0),
+            ReadCell('C1', None, '', 0),
+        ]
+
+    def test_sheets_by_name_and_index(self):
+        workbook = Workbook()
+        workbook.new_sheet('First').cell('A1', value=1)
+        workbook.new_sheet('Second').cell('B3', value=2)
+        with Reader(_saved(workbook)) as reader:
+            assert reader.sheet_names == ['First', 'Second']
+            assert _values(reader, 1) == _values(reader, 'Second') == {'B3': 2}
+            with pytest.raises(ValueError):
+                list(reader.rows('Third'))
+
+    def test_custom_date_formats(self):
+        assert _date_kind('yyyy-mm-dd "at" hh:mm') is datetime.datetime
+        assert _date_kind('mmm yy') is datetime.date
+        assert _date_kind('[h]:mm:ss') is datetime.time
+        assert _date_kind('[Red]0.00;"days"') is None
+        assert _date_kind('General') is None
@@ -0,0 +1,49 @@
+import pytest
+
+from xlsxcessive import reference
+
+
+class TestColumnNames:
+    def test_table_covers_all_excel_columns(self):
+        assert len(reference.COLUMN_NAMES) == 16384
+        assert reference.COLUMN_NAMES[:3] == ('A', 'B', 'C')
+        assert reference.COLUMN_NAMES[-1] == 'XFD'
+
+    @pytest.mark.parametrize(
+        'col, name',
+        [(0, 'A'), (25, 'Z'), (26, 'AA'), (701, 'ZZ'), (702, 'AAA'), (16384, 'XFE')],
+    )
+    def test_names_and_indexes_round_trip(self, col, name):
+        assert reference.column_name(col) == name
+        assert reference.column_index(name) == col
+
+    def test_invalid_columns(self):
+        with pytest.raises(ValueError):
+            reference.column_name(-1)
+        with pytest.raises(ValueError):
+            reference.column_index('A1')
+
+
+class TestReferences:
+    def test_coords_to_a1(self):
+        assert reference.coords_to_a1((5, 1)) == 'B6'
+        assert reference.coords_to_a1((0, 20000)) == 'ACOG1'
+
+    def test_a1_to_coords(self):
+        assert reference.a1_to_coords('B6') == (5, 1)
+        assert reference.a1_to_coords('$AB$12') == (11, 27)
+
+    def test_reference_without_row_is_invalid(self):
+        with pytest.raises(ValueError):
+            reference.a1_to_coords('AB')
+
+    def test_ranges(self):
+        assert reference.range_to_coords('A1:XFD1048576') == ((0, 0), (1048575, 16383))
+        assert reference.range_to_coords('C3') == ((2, 2), (2, 2))
+        assert reference.coords_to_range((0, 0), (1048575, 16383)) == 'A1:XFD1048576'
+
+    def test_batches(self):
+        coords = [(0, 0), (9, 26), (2, 16384)]
+        refs = reference.coords_to_a1_many(coords)
+        assert refs == ['A1', 'AA10', 'XFE3']
+        assert reference.a1_to_coords_many(refs) == coords
@@ -0,0 +1,66 @@
+import io
+
+from xlsxcessive.render import Utf8Writer
+from xlsxcessive.workbook import Workbook
+
+
+def _sheet(workbook, **params):
+    sheet = workbook.new_sheet('Data', **params)
+    for number in range(1, 200):
+        sheet.row(number).cell('A%d' % number, value='café %d' % number)
+        sheet.row(number).cell('B%d' % number, value=number * 0.5)
+    return sheet
+
+
+class TestUtf8Writer:
+    def test_writes_in_chunks(self):
+        chunks = []
+        stream = io.BytesIO()
+        stream.write = chunks.append
+        out = Utf8Writer(stream, chunk_size=10)
+        out.write('été ')
+        out.writelines(['abc'] * 3)
+        out.write_bytes(b'raw')
+        out.write('end')
+        out.flush()
+        assert chunks == ['été abcabcabc'.encode(), b'raw', b'end']
+        assert out.written == sum(map(len, chunks))
+
+
+class TestRenderTo:
+    def test_targets(self):
+        sheet = _sheet(Workbook())
+        expected = str(sheet).encode('utf-8')
+        stream = io.BytesIO()
+        assert sheet.render_to(stream) == len(expected)
+        assert stream.getvalue() == expected
+        data = bytearray(b'prefix')
+        sheet.render_to(data)
+        assert data == b'prefix' + expected
+
+    def test_nested_objects_share_a_writer(self):
+        workbook = Workbook()
+        sheet = _sheet(workbook)
+        data = bytearray()
+        out = Utf8Writer(data)
+        row = sheet.row(3)
+        assert row.render_to(out) == len(str(row).encode('utf-8'))
+        workbook.stylesheet.render_to(out)
+        assert data == (str(row) + str(workbook.stylesheet)).encode('utf-8')
+
+    def test_streaming_sheet_text(self):
+        workbook = Workbook()
+        regular = _sheet(workbook)
+        streaming = _sheet(Workbook(), streaming=True)
+        try:
+            assert str(streaming) == str(regular)
+        finally:
+            streaming.close()
+
+    def test_shared_strings(self):
+        workbook = Workbook(shared_strings=True)
+        _sheet(workbook)
+        data = bytearray()
+        workbook.shared_strings.render_to(data)
+        assert data.decode('utf-8') == str(workbook.shared_strings)
+        assert '<si><t>café 1</t></si>' in data.decode('utf-8')
@@ -1,4 +1,5 @@
-from xlsxcessive.worksheet import Row
+from xlsxcessive.workbook import Workbook
+from xlsxcessive.worksheet import Cell, Row
 
 
 class TestAddingCellsToRow:
@@ -11,3 +12,19 @@ class TestAddingCellsToRow:
         row = Row(None, 1)
         cell = row.cell(value=1)
         assert cell.coords[1] == 0
+
+    def test_cell_belongs_to_the_worksheet(self):
+        workbook = Workbook(shared_strings=True)
+        sheet = workbook.new_sheet('Data')
+        cell = sheet.row(1).cell('A1', value='shared')
+        assert cell.worksheet is sheet
+        assert cell.cell_type == 's'
+
+
+class TestRenderingRow:
+    def test_merges_are_not_repeated(self):
+        row = Row(None, 1)
+        row.cell('A1', value='merged').merge(Cell('B1'))
+        str(row)
+        str(row)
+        assert row.merge_cells == ['A1:B1']
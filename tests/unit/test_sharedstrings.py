@@ -0,0 +1,47 @@
+from xlsxcessive.sharedstrings import SharedStrings
+from xlsxcessive.workbook import Workbook
+
+
+class TestSharedStrings:
+    def setup_method(self):
+        self.strings = SharedStrings()
+
+    def test_adding_returns_sequential_indexes(self):
+        assert self.strings.add('foo') == 0
+        assert self.strings.add('bar') == 1
+
+    def test_adding_the_same_string_twice_returns_the_same_index(self):
+        first = self.strings.add('foo')
+        self.strings.add('bar')
+        assert self.strings.add('foo') == first
+        assert len(self.strings) == 2
+
+    def test_renders_unique_strings(self):
+        self.strings.add('foo')
+        self.strings.add('foo')
+        xml = str(self.strings)
+        assert xml.count('<si><t>foo</t></si>') == 1
+        assert 'uniqueCount="1"' in xml
+
+
+class TestSharedStringCells:
+    def setup_method(self):
+        self.workbook = Workbook(shared_strings=True)
+        self.sheet = self.workbook.new_sheet('Sheet 1')
+
+    def test_string_cells_refer_to_the_shared_table(self):
+        self.sheet.cell('A1', value='Completed')
+        cell = self.sheet.cell('A2', value='Completed')
+        assert str(cell) == '<c r="A2" t="s"><v>0</v></c>'
+        assert len(self.workbook.shared_strings) == 1
+
+    def test_values_are_escaped(self):
+        cell = self.sheet.cell('A1', value='AT&T')
+        assert cell.value == 'AT&amp;T'
+        assert 'AT&amp;T' in self.workbook.shared_strings.index
+
+    def test_shared_strings_are_off_by_default(self):
+        workbook = Workbook()
+        cell = workbook.new_sheet('Sheet 1').cell('A1', value='foo')
+        assert cell.cell_type == 'inlineStr'
+        assert workbook.shared_strings is None
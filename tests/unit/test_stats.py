@@ -0,0 +1,65 @@
+import datetime
+import io
+import time
+
+from xlsxcessive import stats
+from xlsxcessive.reference import _column_name_beyond, column_name
+from xlsxcessive.stats import NULL_STATS, SaveStats
+from xlsxcessive.workbook import Workbook
+
+
+class TestSaveStats:
+    def test_nested_phases_are_exclusive(self):
+        collected = SaveStats()
+        with collected.phase('outer'):
+            time.sleep(0.01)
+            with collected.phase('inner'):
+                time.sleep(0.02)
+        assert collected.phases['inner'] >= 0.02
+        assert 0.01 <= collected.phases['outer'] < 0.02
+
+    def test_collecting_activates_the_stats(self):
+        collected = SaveStats()
+        assert stats.active() is NULL_STATS
+        with collected.collecting():
+            assert stats.active() is collected
+        assert stats.active() is NULL_STATS
+
+    def test_render_methods_report_phases_and_bytes(self):
+        workbook = Workbook()
+        sheet = workbook.new_sheet('Data')
+        sheet.cell('B1', value=1)
+        sheet.cell('A1', value='text')
+        collected = SaveStats()
+        with collected.collecting():
+            sheet.write(io.BytesIO())
+            str(workbook.stylesheet)
+            str(workbook)
+        assert {'worksheet', 'sort', 'styles', 'workbook'} <= set(collected.phases)
+        assert collected.sheets['Data']['bytes'] == len(str(sheet).encode())
+
+    def test_cell_counts(self):
+        sheet = Workbook().new_sheet('Data')
+        sheet.cell('A1', value=1)
+        sheet.cell('B1', value=datetime.date(2024, 1, 1))
+        sheet.cell('C1', value=sheet.formula('A1*2'))
+        sheet.append_rows([[1.5, 'text', datetime.date(2024, 1, 2), None]])
+        counts = sheet._cell_counts()
+        assert counts == {'number': 2, 'date': 2, 'formula': 1, 'string': 1}
+
+    def test_cache_hit_rates(self):
+        _column_name_beyond.cache.clear()
+        collected = SaveStats()
+        with collected.collecting():
+            column_name(30000)
+            column_name(30000)
+        name = 'xlsxcessive.reference._column_name_beyond'
+        assert collected.caches[name]['hit_rate'] == 0.5
+
+    def test_str_summarizes_for_logging(self):
+        collected = SaveStats()
+        with collected.phase('styles'):
+            pass
+        collected.sheet('Data', bytes=10)
+        assert str(collected).startswith('phases: styles ')
+        assert str(collected).endswith('sheets: Data 10 bytes')
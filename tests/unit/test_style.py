@@ -0,0 +1,55 @@
+from xlsxcessive.workbook import Workbook
+
+
+class TestStyleInterning:
+    def setup_method(self, method):
+        self.stylesheet = Workbook().stylesheet
+
+    def _bold(self):
+        fmt = self.stylesheet.new_format()
+        fmt.font(size=12, bold=True)
+        fmt.border(bottom='thin')
+        return fmt
+
+    def test_equal_fonts_and_borders_share_an_index(self):
+        first = self.stylesheet.font(size=12, bold=True)
+        second = self.stylesheet.font(size=12, bold=True)
+        assert first is second
+        assert self.stylesheet.font(size=12).index != first.index
+        assert self.stylesheet.border(top='thin') is self.stylesheet.border(top='thin')
+
+    def test_equal_formats_share_an_index(self):
+        first, second = self._bold(), self._bold()
+        assert first.index == second.index
+        assert str(self.stylesheet).count('<cellXfs count="5">') == 1
+
+    def test_changing_a_format_gives_it_a_new_index(self):
+        first, second = self._bold(), self._bold()
+        assert first.index == second.index
+        second.align('center')
+        assert second.index != first.index
+        assert 'horizontal="center"' in str(self.stylesheet)
+
+    def test_indexes_follow_creation_order(self):
+        first = self.stylesheet.new_format()
+        first.number_format('0.000')
+        second = self.stylesheet.new_format()
+        second.number_format('0.0000')
+        assert (second.index, first.index) == (5, 4)
+
+    def test_stats_count_collapsed_duplicates(self):
+        for _ in range(3):
+            self._bold()
+        stats = self.stylesheet.stats()
+        assert stats.formats == 5
+        assert stats.duplicate_formats == 2
+        assert stats.duplicate_fonts == 2
+        assert stats.duplicate_borders == 2
+
+    def test_formats_built_per_cell_collapse(self):
+        for size in range(1000):
+            fmt = self.stylesheet.new_format()
+            fmt.font(size=size % 50 + 1)
+            fmt.index
+        stats = self.stylesheet.stats()
+        assert (stats.fonts, stats.formats) == (51, 54)
@@ -0,0 +1,103 @@
+import io
+import zipfile
+
+import pytest
+
+from xlsxcessive.errors import XlsxFormatError
+from xlsxcessive.template import WorkbookTemplate
+from xlsxcessive.workbook import Workbook
+from xlsxcessive.xlsx import save
+
+
+def _skeleton(workbook):
+    bold = workbook.stylesheet.new_format()
+    bold.font(bold=True)
+    sheet = workbook.new_sheet('Orders')
+    sheet.col(number=1, width=30)
+    sheet.row(1).cell('A1', value='Customer', format=bold)
+    sheet.row(1).cell('C1', value='Total', format=bold)
+    sheet.formula('SUM(C2:C10)', shared=True)
+    return workbook
+
+
+def _fill(workbook):
+    workbook.sheets[0].append_rows([['Acme', 'x', 12.5], ['Initech', 'y', 3]])
+    return workbook
+
+
+def _parts(workbook):
+    stream = io.BytesIO()
+    save(workbook, None, stream=stream)
+    archive = zipfile.ZipFile(stream)
+    return {name: archive.read(name) for name in archive.namelist()}
+
+
+class TestWorkbookTemplate:
+    def setup_method(self, method):
+        self.template = WorkbookTemplate(_skeleton(Workbook()))
+
+    def test_instance_saves_like_a_workbook_built_from_scratch(self):
+        instance = _fill(self.template.instantiate())
+        assert _parts(instance) == _parts(_fill(_skeleton(Workbook())))
+
+    def test_instances_are_independent(self):
+        first = self.template.instantiate()
+        second = self.template.instantiate()
+        first.sheets[0].row(5).cell('A5', value='only in first')
+        first.sheets[0].col(number=2, width=5)
+        assert 'only in first' not in str(second.sheets[0])
+        assert 'width="5"' not in str(second.sheets[0])
+        assert second.sheets[0].max_row == 1
+
+    def test_new_formats_copy_the_styles(self):
+        instance = self.template.instantiate()
+        italic = instance.stylesheet.new_format()
+        italic.font(italic=True)
+        assert italic.index == 5
+        assert '<i/>' in str(instance.stylesheet)
+        assert '<i/>' not in str(self.template.instantiate().stylesheet)
+        assert '<i/>' not in str(self.template.stylesheet)
+
+    def test_template_formats_cant_be_changed(self):
+        instance = self.template.instantiate()
+        bold = self.template.stylesheet.formats[-1]
+        instance.sheets[0].cell('B3', value='bold', format=bold)
+        with pytest.raises(XlsxFormatError):
+            bold.font(size=30)
+
+    def test_cells_added_to_template_rows_are_merged(self):
+        instance = self.template.instantiate()
+        instance.sheets[0].row(1).cell('B1', value='Product')
+        xml = str(instance.sheets[0])
+        assert xml.count('<row r="1"') == 1
+        assert '<row r="1" spans="1:3">' in xml
+        assert xml.index('Customer') < xml.index('Product') < xml.index('Total')
+
+    def test_shared_formulas_follow_those_of_the_template(self):
+        instance = self.template.instantiate()
+        formula = instance.sheets[0].formula('AVERAGE(C2:C10)', shared=True)
+        assert formula.index == 1
+
+    def test_template_formulas_cant_be_extended(self):
+        instance = self.template.instantiate()
+        formula = instance.sheets[0].formulas[0]
+        with pytest.raises(ValueError):
+            instance.sheets[0].cell('C11', formula)
+        assert formula.bounds is None
+        assert 'C11' not in str(self.template.instantiate().sheets[0])
+
+    def test_styles_part_is_prepared(self):
+        instance = self.template.instantiate()
+        cache = instance.stylesheet._part_cache
+        entry = cache.entry
+        _parts(instance)
+        assert cache.entry is entry
+
+    def test_streaming_sheets_are_refused(self):
+        workbook = Workbook()
+        sheet = workbook.new_sheet('Export', streaming=True)
+        try:
+            with pytest.raises(ValueError):
+                WorkbookTemplate(workbook)
+        finally:
+            sheet.close()
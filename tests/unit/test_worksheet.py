@@ -1,6 +1,14 @@
+import datetime
+import decimal
+import gc
 import random
+import sys
+import warnings
 
-from xlsxcessive.worksheet import Worksheet
+import pytest
+
+from xlsxcessive.workbook import Workbook
+from xlsxcessive.worksheet import Cell, Worksheet
 
 
 class TestAddingCellsToWorksheet:
@@ -59,3 +67,417 @@ class TestCallingRowMethod:
         assert row.number == 3
         assert self.sheet.row_map[3] == row
         assert self.sheet.rows[0].number == 3
+
+
+class TestStreamingWorksheet:
+    def setup_method(self, method):
+        self.workbook = Workbook()
+        self.sheet = self.workbook.new_sheet('stream', streaming=True)
+        self.format = self.workbook.stylesheet.new_format()
+
+    def teardown_method(self, method):
+        self.sheet.close()
+
+    def _populate(self, sheet):
+        sheet.col(number=1, width=10)
+        for number in range(1, 50):
+            row = sheet.row(number)
+            row.cell('B%d' % number, value=number * 2, format=self.format)
+            row.cell('A%d' % number, value='row %d' % number)
+        sheet.cell('A50', 'merged').merge(Cell('C50'))
+
+    def test_renders_like_a_regular_worksheet(self):
+        regular = self.workbook.new_sheet('regular')
+        self._populate(regular)
+        self._populate(self.sheet)
+        assert str(self.sheet) == str(regular)
+
+    def test_finished_rows_are_released(self):
+        self._populate(self.sheet)
+        assert [row.number for row in self.sheet.rows] == [50]
+
+    def test_finished_rows_cannot_be_revisited(self):
+        self.sheet.row(2)
+        self.sheet.row(3)
+        with pytest.raises(ValueError):
+            self.sheet.row(1)
+        assert self.sheet.row(3) is self.sheet.row(3)
+
+    def test_spool_is_discarded_with_the_sheet(self):
+        workbook = Workbook()
+        self._populate(workbook.new_sheet('dropped', streaming=True))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            del workbook
+            gc.collect()
+        assert not caught
+
+    def test_workbook_closes_its_sheets(self):
+        with Workbook() as workbook:
+            sheet = workbook.new_sheet('closed', streaming=True)
+            self._populate(sheet)
+        assert sheet._spool.closed
+
+
+class TestSpillingWorksheet:
+    def setup_method(self, method):
+        self.workbook = Workbook()
+        self.sheet = self.workbook.new_sheet('spill', spill_rows=10)
+        self.format = self.workbook.stylesheet.new_format()
+
+    def teardown_method(self, method):
+        self.sheet.close()
+
+    def _populate(self, sheet):
+        numbers = list(range(1, 100))
+        random.Random(7).shuffle(numbers)
+        sheet.col(number=1, width=10)
+        for number in numbers:
+            row = sheet.row(number)
+            row.cell('C%d' % number, value=number * 2, format=self.format)
+            row.cell('A%d' % number, value='row %d' % number)
+        # revisit spilled rows
+        for number in numbers[:20]:
+            sheet.cell('B%d' % number, value=number / 4)
+            sheet.cell('D%d' % number, value=datetime.date(2020, 1, number % 28 + 1))
+        sheet.append_rows([[1, 'packed', None, 2.5]] * 15)
+        sheet.cell('A50', 'merged').merge(Cell('A51'))
+
+    def test_renders_like_a_regular_worksheet(self):
+        regular = self.workbook.new_sheet('regular')
+        self._populate(regular)
+        self._populate(self.sheet)
+        assert str(self.sheet) == str(regular)
+
+    def test_rows_are_spilled(self):
+        self._populate(self.sheet)
+        assert len(self.sheet.rows) <= 10
+        assert len(self.sheet._runs) > 1
+
+    def test_runs_are_discarded_with_the_sheet(self):
+        workbook = Workbook()
+        self._populate(workbook.new_sheet('dropped', spill_rows=10))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            del workbook
+            gc.collect()
+        assert not caught
+
+    def test_shared_formula_rows_stay_in_memory(self):
+        formula = self.sheet.formula('A1*2', shared=True)
+        self.sheet.cell('B1', formula)
+        for number in range(2, 30):
+            self.sheet.cell('B%d' % number, formula)
+        assert self.sheet.rows[0].number == 1
+        assert 'ref="B1:B29"' in str(self.sheet)
+
+    def test_spill_rows_must_be_positive(self):
+        with pytest.raises(ValueError):
+            self.workbook.new_sheet('invalid', spill_rows=0)
+
+
+class TestAppendRows:
+    def setup_method(self, method):
+        self.workbook = Workbook()
+        self.sheet = self.workbook.new_sheet('bulk')
+        self.format = self.workbook.stylesheet.new_format()
+        self.rows = [
+            [1, 2.5, 'AT&T', decimal.Decimal('19.99')],
+            [None, -3, 'two', 4],
+        ]
+
+    def test_renders_like_equivalent_cells(self):
+        expected = self.workbook.new_sheet('cells')
+        formats = [None, self.format]
+        for rowidx, values in enumerate(self.rows):
+            for colidx, value in enumerate(values):
+                if value is not None:
+                    fmt = formats[colidx] if colidx < len(formats) else None
+                    expected.cell(coords=(rowidx, colidx), value=value, format=fmt)
+        self.sheet.append_rows(self.rows, formats=formats)
+        assert str(self.sheet) == str(expected)
+
+    def test_appends_below_existing_rows(self):
+        self.sheet.cell('A3', value='header')
+        self.sheet.append_rows(self.rows)
+        assert [row.number for row in self.sheet.rows] == [3, 4, 5]
+
+    def test_cells_are_created_on_demand(self):
+        self.sheet.append_rows(self.rows)
+        row = self.sheet.row(1)
+        assert [cell.reference for cell in row.cells] == ['A1', 'B1', 'C1', 'D1']
+        assert row.cell_map['C1'].value == 'AT&amp;T'
+
+    def test_dates_render_like_equivalent_cells(self):
+        values = [
+            datetime.date(2006, 2, 1),
+            datetime.datetime(2006, 2, 1, 10, 5, 54),
+            datetime.time(12),
+        ]
+        self.sheet.append_rows([values], formats=[None, self.format])
+        expected = self.workbook.new_sheet('cells')
+        expected.cell('A1', value=values[0])
+        expected.cell('B1', value=values[1], format=self.format)
+        expected.cell('C1', value=values[2])
+        assert str(self.sheet) == str(expected)
+
+    def test_other_values_fall_back_to_cells(self):
+        formula = self.sheet.formula('SUM(A1:B1)')
+        self.sheet.append_rows([[1, 2, formula]])
+        assert '<c r="C1" t="str">' in str(self.sheet)
+
+
+class TestWriteArray:
+    def setup_method(self, method):
+        self.numpy = pytest.importorskip('numpy')
+        self.workbook = Workbook()
+        self.sheet = self.workbook.new_sheet('array')
+
+    def test_renders_like_equivalent_cells(self):
+        array = self.numpy.array([[0.1, 1e16, -2.5], [3.0, 1 / 3, 7e-9]])
+        self.sheet.write_array(array, origin='B2')
+        expected = self.workbook.new_sheet('cells')
+        for rowidx, values in enumerate(array.tolist()):
+            for colidx, value in enumerate(values):
+                expected.cell(coords=(rowidx + 1, colidx + 1), value=value)
+        assert str(self.sheet) == str(expected)
+
+    def test_non_finite_values_leave_cells_empty(self):
+        nan, inf = self.numpy.nan, self.numpy.inf
+        self.sheet.write_array(self.numpy.array([[nan, 1.5, inf]]))
+        assert [cell.reference for cell in self.sheet.row(1).cells] == ['B1']
+
+    def test_integer_arrays(self):
+        array = self.numpy.arange(6, dtype='int64').reshape(2, 3)
+        self.sheet.write_array(array)
+        assert '<c r="C2" t="n"><v>5</v></c>' in str(self.sheet)
+
+    def test_float32_arrays_render_like_equivalent_cells(self):
+        array = self.numpy.array([[0.1, 2.5, 1 / 3]], dtype='float32')
+        self.sheet.write_array(array)
+        expected = self.workbook.new_sheet('cells')
+        for colidx, value in enumerate(array[0]):
+            expected.cell(coords=(0, colidx), value=value)
+        assert str(self.sheet) == str(expected)
+        assert '<v>0.1</v>' in str(self.sheet)
+
+    def test_integers_out_of_float_range_stay_ints(self):
+        array = self.numpy.array([[-(2**63), 1]], dtype='int64')
+        self.sheet.write_array(array)
+        assert self.sheet.row(1)._store.objects == [-(2**63)]
+        assert '<v>-9223372036854775808</v>' in str(self.sheet)
+
+    def test_formats_apply_by_column(self):
+        fmt = self.workbook.stylesheet.new_format()
+        self.sheet.write_array(self.numpy.ones((2, 2)), formats=[None, fmt])
+        assert '<c r="B2" t="n" s="%d"><v>1.0</v></c>' % fmt.index in str(self.sheet)
+
+    def test_datetime64_arrays_render_like_equivalent_cells(self):
+        array = self.numpy.array(
+            [['2006-02-01T10:05:54', 'NaT'], ['1900-02-28T12:00', '9999-12-31']],
+            dtype='datetime64[s]',
+        )
+        self.sheet.write_array(array)
+        expected = self.workbook.new_sheet('cells')
+        for rowidx, values in enumerate(array.tolist()):
+            for colidx, value in enumerate(values):
+                if value is not None:
+                    expected.cell(coords=(rowidx, colidx), value=value)
+        assert str(self.sheet) == str(expected)
+
+    def test_rejects_other_shapes_and_types(self):
+        with pytest.raises(ValueError):
+            self.sheet.write_array(self.numpy.ones(3))
+        with pytest.raises(ValueError):
+            self.sheet.write_array(self.numpy.array([['a']]))
+
+
+class TestCompactRows:
+    def setup_method(self, method):
+        self.workbook = Workbook()
+        self.sheet = self.workbook.new_sheet('compact')
+        self.format = self.workbook.stylesheet.new_format()
+
+    def test_rows_render_like_equivalent_cells(self):
+        rows = [
+            [0.5, 7, 2**60, 'x', None, datetime.date(2006, 2, 1), True],
+            [None, None, 1.5, decimal.Decimal('2.50'), datetime.time(12)],
+        ]
+        formats = [self.format, None, None, self.format]
+        self.sheet.append_rows(rows, formats)
+        expected = self.workbook.new_sheet('cells')
+        for rowidx, values in enumerate(rows):
+            for colidx, value in enumerate(values):
+                if value is not None:
+                    fmt = formats[colidx] if colidx < len(formats) else None
+                    expected.cell(coords=(rowidx, colidx), value=value, format=fmt)
+        assert str(self.sheet) == str(expected)
+
+    def test_many_formats_render_like_equivalent_cells(self):
+        expected = self.workbook.new_sheet('cells')
+        for number in range(1, 301):
+            fmt = self.workbook.stylesheet.new_format()
+            fmt.number_format('0.0 "%d"' % number)
+            self.sheet.append_rows([[number, 1.5]], formats=[fmt, self.format])
+            expected.cell(coords=(number - 1, 0), value=number, format=fmt)
+            expected.cell(coords=(number - 1, 1), value=1.5, format=self.format)
+        assert str(self.sheet) == str(expected)
+        self.format.font(bold=True)
+        assert str(self.sheet) == str(expected)
+
+    def test_style_attributes_are_built_once(self):
+        fmt = self.workbook.stylesheet.new_format()
+        self.sheet.append_rows([[1, 2]] * 3, formats=[fmt])
+        attrs = self.sheet._style_attrs()
+        str(self.sheet)
+        assert self.sheet._style_attrs() is attrs
+
+    def test_cell_views_have_the_stored_values(self):
+        self.sheet.append_rows([[0.5, 7, 'x', datetime.date(1900, 1, 1)]])
+        cells = self.sheet.row(1).cells
+        assert [cell.value for cell in cells] == [0.5, 7, 'x', 1]
+        assert type(cells[1].value) is int
+        assert cells[3]._is_date
+
+    def test_cell_views_keep_their_formats(self):
+        self.sheet.append_rows([[1, 2]], formats=[None, self.format])
+        cells = self.sheet.row(1).cells
+        assert cells[0].format is None
+        assert cells[1].format is self.format
+
+    def test_writing_before_stored_columns_falls_back_to_cells(self):
+        self.sheet.append_rows([[None, None, 3]])
+        self.sheet.row(1)._pack([1, 2], None)
+        references = [cell.reference for cell in self.sheet.row(1).cells]
+        assert sorted(references) == ['A1', 'B1', 'C1']
+
+    def test_uses_less_memory_than_cells(self):
+        values = [float(value) for value in range(20)]
+        self.sheet.append_rows([values] * 100)
+        store = self.sheet.row(1)._store
+        compact = sum(
+            sys.getsizeof(column)
+            for column in (store.cols, store.types, store.styles, store.numbers)
+        )
+        cells = self.sheet.row(2).cells
+        regular = sum(
+            sys.getsizeof(cell) + sys.getsizeof(cell.reference) for cell in cells
+        )
+        assert compact * 3 < regular
+
+
+class TestFillFormula:
+    def setup_method(self, method):
+        self.workbook = Workbook()
+        self.sheet = self.workbook.new_sheet('formulas')
+
+    def test_renders_like_assigning_the_formula_to_each_cell(self):
+        expected = self.workbook.new_sheet('cells')
+        formula = expected.formula('A2*2', shared=True)
+        for row in range(1, 5):
+            for col in (3, 4):
+                expected.cell(coords=(row, col), value=formula)
+        self.sheet.fill_formula('A2*2', 'D2:E5')
+        assert str(self.sheet) == str(expected)
+
+    def test_range_is_known_up_front(self):
+        formula = self.sheet.fill_formula('A1+1', 'B1:B1000')
+        assert formula.bounds == (0, 1, 999, 1)
+        assert formula._refs == 'B1:B1000'
+
+    def test_values_next_to_stored_columns_are_stored(self):
+        self.sheet.append_rows([[1, 2], [3, 4]])
+        fmt = self.workbook.stylesheet.new_format()
+        self.sheet.fill_formula('A1+B1', 'C1:C2', format=fmt)
+        row = self.sheet.row(2)
+        assert row._store is not None
+        cell = row.cells[2]
+        assert cell.reference == 'C2'
+        assert cell.value.master is self.sheet.formulas[0]
+        assert cell.format is self.sheet._formats[0]
+
+    def test_shared_range_follows_later_cells(self):
+        formula = self.sheet.formula('A1*2', shared=True)
+        self.sheet.cell('B1', value=formula)
+        self.sheet.cell('B2', value=formula)
+        assert 'ref="B1:B2"' in str(self.sheet)
+        self.sheet.cell('C3', value=formula)
+        assert 'ref="B1:C3"' in str(self.sheet)
+
+
+class _SortCountingList(list):
+    sorts = 0
+
+    def sort(self, *args, **kwargs):
+        type(self).sorts += 1
+        super().sort(*args, **kwargs)
+
+
+class TestRenderOrder:
+    def setup_method(self, method):
+        self.sheet = Worksheet(None, 'test', None, None)
+        _SortCountingList.sorts = 0
+
+    def _references(self):
+        xml = str(self.sheet)
+        return [part.split('"')[0] for part in xml.split('<c r="')[1:]]
+
+    def test_cells_render_in_column_order(self):
+        for ref in ['AA2', 'B1', 'Z2', 'A2', 'AB1', 'C1']:
+            self.sheet.cell(ref, value=1)
+        assert self._references() == ['B1', 'C1', 'AB1', 'A2', 'Z2', 'AA2']
+
+    def test_cells_added_in_order_are_not_sorted(self):
+        for col in range(30):
+            self.sheet.cell(coords=(0, col), value=col)
+        row = self.sheet.row(1)
+        row._cells = _SortCountingList(row._cells)
+        self.sheet.rows = _SortCountingList(self.sheet.rows)
+        str(self.sheet)
+        assert _SortCountingList.sorts == 0
+
+    def test_unchanged_sheet_is_not_sorted_again(self):
+        for ref in ['C3', 'A3', 'B1']:
+            self.sheet.cell(ref, value=1)
+        self.sheet.rows = _SortCountingList(self.sheet.rows)
+        for row in self.sheet.rows:
+            row._cells = _SortCountingList(row._cells)
+        first = str(self.sheet)
+        assert _SortCountingList.sorts == 2
+        assert str(self.sheet) == first
+        assert _SortCountingList.sorts == 2
+
+
+class TestUsedRange:
+    def _fill(self, sheet):
+        for ref in ['B3', 'F5', 'D7']:
+            sheet.cell(ref, value=1)
+        sheet.row(9)
+        return sheet
+
+    def test_dimension_and_spans(self):
+        sheet = self._fill(Worksheet(None, 'test', None, None))
+        sheet.row(5).cell('C5', value=2)
+        xml = str(sheet)
+        assert '<dimension ref="B3:F7"/>' in xml
+        assert '<row r="5" spans="3:6">' in xml
+        assert '<row r="9">' in xml
+
+    def test_packed_rows(self):
+        sheet = Workbook().new_sheet('Data')
+        sheet.append_rows([[None, 1, 2], [3]])
+        xml = str(sheet)
+        assert '<dimension ref="A1:C2"/>' in xml
+        assert '<row r="1" spans="2:3">' in xml
+
+    def test_empty_sheet(self):
+        assert '<dimension ref="A1"/>' in str(Worksheet(None, 'test', None, None))
+
+    @pytest.mark.parametrize('params', [{'streaming': True}, {'spill_rows': 1}])
+    def test_written_rows_count(self, params):
+        workbook = Workbook()
+        sheet = self._fill(workbook.new_sheet('Data', **params))
+        try:
+            assert str(sheet) == str(self._fill(workbook.new_sheet('Regular')))
+        finally:
+            sheet.close()
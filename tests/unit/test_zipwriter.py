@@ -0,0 +1,91 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from xlsxcessive.zipwriter import ZIP_STORED, ZipWriter
+
+
+class TestZipWriter:
+    def setup_method(self, method):
+        self.output = io.BytesIO()
+        # Compressible data with some noise, spanning many small chunks
+        self.data = b''.join(os.urandom(100) + b'<c r="A1"/>' * 500 for _ in range(40))
+
+    def _write(self, threads=3, **params):
+        with ZipWriter(
+            self.output, chunk_size=4096, threads=threads, **params
+        ) as archive:
+            archive.write_entry('small.xml', b'<small/>')
+            with archive.open_entry('big.xml', force_zip64=True) as entry:
+                for start in range(0, len(self.data), 1000):
+                    entry.write(self.data[start : start + 1000])
+            with archive.open_entry('empty.xml') as entry:
+                pass
+        return zipfile.ZipFile(self.output)
+
+    def test_chunked_entries_deflate_to_a_valid_stream(self):
+        archive = self._write()
+        assert archive.testzip() is None
+        assert archive.read('big.xml') == self.data
+        assert archive.read('small.xml') == b'<small/>'
+        assert archive.read('empty.xml') == b''
+        info = archive.getinfo('big.xml')
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.compress_size < info.file_size // 5
+
+    def test_stored_entries(self):
+        archive = self._write(compression=ZIP_STORED)
+        assert archive.read('big.xml') == self.data
+        assert archive.getinfo('big.xml').compress_size == len(self.data)
+
+    def test_compresslevel(self):
+        fast = self._write(compresslevel=1).getinfo('big.xml').compress_size
+        self.output = io.BytesIO()
+        best = self._write(compresslevel=9).getinfo('big.xml').compress_size
+        assert best <= fast
+
+    def test_output_does_not_depend_on_threads(self):
+        self._write()
+        first = self.output.getvalue()
+        self.output = io.BytesIO()
+        self._write(threads=1)
+        assert self.output.getvalue() == first
+
+    def test_captured_entries_can_be_written_again(self):
+        with ZipWriter(io.BytesIO(), chunk_size=4096) as archive:
+            with archive.open_entry('big.xml', capture=True) as entry:
+                entry.write(self.data)
+        compressed = entry.compressed()
+        assert compressed.size == len(self.data)
+        with ZipWriter(self.output) as archive:
+            archive.write_compressed('copy.xml', compressed)
+        archive = zipfile.ZipFile(self.output)
+        assert archive.testzip() is None
+        assert archive.read('copy.xml') == self.data
+
+    def test_many_entries_use_zip64_end_records(self):
+        with ZipWriter(self.output) as archive:
+            for number in range(70000):
+                archive.write_entry('%d.txt' % number, b'')
+        assert len(zipfile.ZipFile(self.output).infolist()) == 70000
+
+    def test_failures_leave_no_valid_archive(self, tmp_path):
+        path = tmp_path / 'failed.zip'
+        with pytest.raises(RuntimeError):
+            with ZipWriter(path) as archive:
+                archive.write_entry('small.xml', b'<small/>')
+                raise RuntimeError
+        assert not path.exists()
+        with pytest.raises(RuntimeError):
+            with ZipWriter(self.output, chunk_size=4096, threads=3) as archive:
+                with archive.open_entry('big.xml') as entry:
+                    entry.write(self.data)
+                    raise RuntimeError
+        with pytest.raises(zipfile.BadZipFile):
+            zipfile.ZipFile(self.output)
+
+    def test_rejects_other_compression_methods(self):
+        with pytest.raises(ValueError):
+            ZipWriter(self.output, compression=zipfile.ZIP_BZIP2)
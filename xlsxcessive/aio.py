@@ -0,0 +1,111 @@
+"""Saving workbooks from asyncio code.
+
+save_stream runs xlsx.save in a worker thread and hands the bytes of the
+package to the event loop in chunks, as they are produced::
+
+    async def download(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        async for chunk in save_stream(workbook):
+            await response.write(chunk)
+        return response
+
+The worker thread blocks while max_pending chunks wait to be consumed, so
+a slow client holds back the save instead of filling memory. The workbook
+must not be changed until the stream is exhausted.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from xlsxcessive import xlsx
+
+_DONE = object()
+
+
+class _Cancelled(Exception):
+    """Stops a save whose stream is no longer consumed."""
+
+
+class _QueueWriter:
+    """A binary file-like object putting chunks of what is written into an
+    asyncio queue, from a thread other than the event loop's.
+    """
+
+    def __init__(self, loop, queue, chunk_size, cancelled):
+        self.loop = loop
+        self.queue = queue
+        self.chunk_size = chunk_size
+        self.cancelled = cancelled
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.chunk_size:
+            self._put(bytes(self.buffer[: self.chunk_size]))
+            del self.buffer[: self.chunk_size]
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self._put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def _put(self, item):
+        if self.cancelled.is_set():
+            raise _Cancelled()
+        put = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        while True:
+            try:
+                return put.result(timeout=0.1)
+            except concurrent.futures.TimeoutError:
+                if self.cancelled.is_set():
+                    put.cancel()
+                    raise _Cancelled()
+
+
+async def save_stream(workbook, chunk_size=2**16, max_pending=8, **params):
+    """Generate the bytes of the saved workbook in chunks of chunk_size.
+
+    The package is written by xlsx.save in a worker thread; params are
+    passed on to it (workers, compresslevel, ...). Worksheets are rendered
+    by a thread pool unless pool is given, as processes can't be forked
+    safely from the worker thread. At most max_pending chunks are buffered
+    ahead of the consumer.
+    """
+    params.setdefault('pool', 'thread')
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(max_pending)
+    cancelled = threading.Event()
+    writer = _QueueWriter(loop, queue, chunk_size, cancelled)
+
+    def save():
+        try:
+            xlsx.save(workbook, None, writer, **params)
+            writer.flush()
+            result = _DONE
+        except _Cancelled:
+            return
+        except BaseException as error:
+            result = error
+        try:
+            writer._put(result)
+        except _Cancelled:
+            pass
+
+    thread = threading.Thread(target=save, name='xlsxcessive-save', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+        # Unblock the worker if it waits for room in the queue.
+        while not queue.empty():
+            queue.get_nowait()
@@ -1,13 +1,121 @@
+"""Bounded memoization for the helpers of xlsxcessive.
+
+Every cache created by CacheDecorator is registered by the name of the
+function it wraps, so that the caches can be inspected and cleared as a
+whole:
+
+>>> @CacheDecorator(maxsize=2)
+... def double(n):
+...     return n * 2
+>>> double(1), double(2), double(1), double(3)
+(2, 4, 2, 6)
+>>> double.cache.info()
+CacheInfo(hits=1, misses=3, evictions=1, maxsize=2, currsize=2)
+>>> double.cache.clear()
+>>> double.cache.info()
+CacheInfo(hits=0, misses=0, evictions=0, maxsize=2, currsize=0)
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import threading
+from typing import NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
+
+
+# The number of entries kept by a cache unless told otherwise
+DEFAULT_MAXSIZE = 2**16
+
+# All caches, by the qualified name of the function they wrap
+registry = {}
+
+
 class CacheDecorator:
-    def __init__(self):
-        self.cache = {}
+    """Memoize a function of hashable arguments, evicting the least
+    recently used results beyond maxsize entries.
+
+    A maxsize of None lets the cache grow without limit. The decorated
+    function gets a `cache` attribute referring to this object.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.cache = collections.OrderedDict()
         self.func = None
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _evict(self, maxsize):
+        if maxsize is None:
+            return
+        while len(self.cache) > maxsize:
+            self.cache.popitem(last=False)
+            self.evictions += 1
 
-    def cached_func(self, *args):
-        if args not in self.cache:
-            self.cache[args] = self.func(*args)
-        return self.cache[args]
+    def info(self):
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, self.maxsize, len(self.cache)
+        )
+
+    def clear(self):
+        """Drop all cached results and reset the counters."""
+        with self._lock:
+            self.cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def resize(self, maxsize):
+        """Change the size limit, evicting entries beyond it right away."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict(maxsize)
 
     def __call__(self, func):
         self.func = func
-        return self.cached_func
+        cache = self.cache
+
+        @functools.wraps(func)
+        def cached_func(*args):
+            try:
+                value = cache[args]
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                try:
+                    cache.move_to_end(args)
+                except KeyError:
+                    # evicted by another thread in the meantime
+                    pass
+                return value
+            value = func(*args)
+            with self._lock:
+                self.misses += 1
+                cache[args] = value
+                self._evict(self.maxsize)
+            return value
+
+        cached_func.cache = self
+        registry['%s.%s' % (func.__module__, func.__qualname__)] = self
+        return cached_func
+
+
+def cache_info():
+    """Return the CacheInfo of every registered cache, by name."""
+    return {name: cache.info() for name, cache in registry.items()}
+
+
+def clear_caches():
+    """Clear every registered cache."""
+    for cache in registry.values():
+        cache.clear()
@@ -0,0 +1,146 @@
+"""Conversion of dates and times to OOXML serial values, and back.
+
+Implements DATEVALUE and TIMEVALUE as described in 3.17.4 of the OOXML
+spec part 4, for single values and for whole numpy datetime64 arrays.
+
+For 1900 based systems:
+
+DATEVALUE("01-Jan-1900") results in the serial value 1.0000000...
+DATEVALUE("03-Feb-1910") results in the serial value 3687.0000000...
+DATEVALUE("01-Feb-2006") results in the serial value 38749.0000000...
+DATEVALUE("31-Dec-9999") results in the serial value 2958465.0000000...
+
+Furthermore, 1900 is treated as a leap year:
+
+DATEVALUE("28-Feb-1900") results in 59
+DATEVALUE("01-Mar-1900") results in 61
+
+For 1904 based systems:
+
+DATEVALUE("01-Jan-1904") results in the serial value 0.0000000...
+DATEVALUE("03-Feb-1910") results in the serial value 2225.0000000...
+DATEVALUE("01-Feb-2006") results in the serial value 37287.0000000...
+DATEVALUE("31-Dec-9999") results in the serial value 2957003.0000000...
+
+TIMEVALUE("00:00:00") results in the serial value 0.0000000...
+TIMEVALUE("00:00:01") results in the serial value 0.0000115...
+TIMEVALUE("10:05:54") results in the serial value 0.4207639...
+TIMEVALUE("12:00:00") results in the serial value 0.5000000...
+TIMEVALUE("23:59:59") results in the serial value 0.9999884...
+"""
+
+import datetime
+import math
+
+_MARCH_1_1900 = datetime.date(1900, 3, 1).toordinal()
+_UNIX_EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
+class DateSerializer:
+    """Converts dates, datetimes and times to serial values.
+
+    The epoch offsets for the date system are computed once, so converting
+    a value is a single subtraction.
+    """
+
+    def __init__(self, date1904=False):
+        self.date1904 = date1904
+        if date1904:
+            self._offset = self._early_offset = datetime.date(1904, 1, 1).toordinal()
+        else:
+            self._offset = datetime.date(1899, 12, 30).toordinal()
+            # before the fictitious 29-Feb-1900, serial values are one less
+            self._early_offset = datetime.date(1899, 12, 31).toordinal()
+        # The conversion methods by type, filled in as types are seen
+        self._converters = {
+            datetime.date: self.date,
+            datetime.datetime: self.datetime,
+            datetime.time: self.time,
+        }
+
+    def date(self, value):
+        ordinal = value.toordinal()
+        if ordinal < _MARCH_1_1900:
+            return ordinal - self._early_offset
+        return ordinal - self._offset
+
+    @staticmethod
+    def time(value):
+        # calculate number of seconds since 00:00:00
+        seconds = value.second + value.minute * 60 + value.hour * 60 * 60
+        return seconds / 86400
+
+    def datetime(self, value):
+        return float(self.date(value)) + self.time(value)
+
+    def to_date(self, serial):
+        """Return the date of a serial value, the inverse of date().
+
+        The time of day is dropped. The fictitious 29-Feb-1900 of the 1900
+        based system is read as 1-Mar-1900.
+        """
+        days = math.floor(serial)
+        ordinal = days + self._offset
+        if ordinal < _MARCH_1_1900:
+            ordinal = days + self._early_offset
+        return datetime.date.fromordinal(ordinal)
+
+    @staticmethod
+    def to_time(serial):
+        """Return the time of day of a serial value, to the second."""
+        seconds = round((serial - math.floor(serial)) * 86400) % 86400
+        return _clock(seconds)
+
+    def to_datetime(self, serial):
+        """Return the datetime of a serial value, to the second."""
+        days, seconds = divmod(round(serial * 86400), 86400)
+        return datetime.datetime.combine(self.to_date(days), _clock(seconds))
+
+    def converter(self, kind):
+        """Return the conversion method for values of type kind."""
+        try:
+            return self._converters[kind]
+        except KeyError:
+            pass
+        if issubclass(kind, datetime.datetime):
+            convert = self.datetime
+        elif issubclass(kind, datetime.date):
+            convert = self.date
+        elif issubclass(kind, datetime.time):
+            convert = self.time
+        else:
+            raise TypeError("Not a date, datetime or time type: %r" % kind)
+        self._converters[kind] = convert
+        return convert
+
+    def datetime64(self, array):
+        """Convert a numpy datetime64 array to an array of serial values.
+
+        Arrays with a unit of days or coarser give integer serials, finer
+        units give float serials. NaT values must be masked by the caller.
+        """
+        import numpy
+
+        days = array.astype('datetime64[D]')
+        ordinals = days.astype('int64') + _UNIX_EPOCH
+        offsets = numpy.where(
+            ordinals < _MARCH_1_1900, self._early_offset, self._offset
+        )
+        serials = ordinals - offsets
+        if not is_datetime64_with_time(array):
+            return serials
+        seconds = (array - days).astype('timedelta64[s]').astype('int64')
+        return serials + seconds / 86400
+
+
+def is_datetime64_with_time(array):
+    """Does the datetime64 array have a unit finer than days?"""
+    import numpy
+
+    unit, count = numpy.datetime_data(array.dtype)
+    return unit not in ('Y', 'M', 'W', 'D')
+
+
+def _clock(seconds):
+    """Return the time of day seconds after midnight."""
+    return datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60)
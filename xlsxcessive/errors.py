@@ -1,2 +1,12 @@
 class XlsxFormatError(Exception):
     pass
+
+
+class XlsxMemoryError(Exception):
+    """The estimated memory use of a Workbook went over its max_memory."""
+
+    def __init__(self, usage, limit):
+        self.usage = usage
+        self.limit = limit
+        msg = "Workbook holds an estimated %d bytes, over its max_memory of %d bytes"
+        super().__init__(msg % (usage, limit))
@@ -10,14 +10,17 @@ workbook = """\
 </workbook>
 """
 
-worksheet = """\
+worksheet_head = """\
 <?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <worksheet
     xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
     xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+  %(dimension)s
   %(cols)s
   <sheetData>
-    %(rows)s
+    """
+
+worksheet_tail = """
   </sheetData>
   %(merge_cells)s
 </worksheet>
@@ -37,3 +40,31 @@ stylesheet = """\
 %(formats)s
 </styleSheet>
 """
+
+content_types = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+%(defaults)s%(overrides)s</Types>
+"""
+
+content_type_default = (
+    '<Default Extension="%(extension)s" ContentType="%(content_type)s"/>'
+)
+
+content_type_override = '<Override PartName="%(name)s" ContentType="%(content_type)s"/>'
+
+relationships = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+%(relationships)s</Relationships>
+"""
+
+relationship = '<Relationship Id="%(id)s" Type="%(type)s" Target="%(target)s"/>'
+
+shared_strings_head = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    uniqueCount="%(unique_count)d">"""
+
+shared_strings_tail = """</sst>
+"""
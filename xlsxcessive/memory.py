@@ -0,0 +1,46 @@
+"""Estimating the memory held by workbooks.
+
+Sizes come from sys.getsizeof of the objects making up worksheets, styles
+and shared strings; objects shared with the rest of the program (small
+integers, interned strings) may be counted more than once.
+"""
+
+import sys
+from typing import NamedTuple
+
+
+class MemoryUsage(NamedTuple):
+    rows: int
+    cells: int
+    formulas: int
+    styles: int
+    strings: int
+    total: int
+
+
+def usage(rows=0, cells=0, formulas=0, styles=0, strings=0):
+    """Return a MemoryUsage with its total."""
+    return MemoryUsage(
+        rows,
+        cells,
+        formulas,
+        styles,
+        strings,
+        rows + cells + formulas + styles + strings,
+    )
+
+
+def combine(usages):
+    """Return the sum of MemoryUsages."""
+    return usage(*[sum(values) for values in zip(*usages)][:5]) if usages else usage()
+
+
+def sizeof(value):
+    """The size of a cell value not shared with other objects."""
+    if value is None or value is True or value is False:
+        return 0
+    return sys.getsizeof(value)
+
+
+def sizeof_all(values):
+    return sum(map(sys.getsizeof, values))
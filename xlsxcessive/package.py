@@ -0,0 +1,165 @@
+"""A minimal OOXML package writer.
+
+Unlike openpack, which needs the complete content of every part in memory
+before the package is saved, parts here are written into their zip entries
+incrementally (see xlsxcessive.zipwriter).
+"""
+
+import posixpath
+
+from xlsxcessive import markup
+from xlsxcessive.zipwriter import ZIP_DEFLATED, ZipWriter
+
+RELATIONSHIPS_CONTENT_TYPE = "application/vnd.openxmlformats-package.relationships+xml"
+
+
+class PartCache:
+    """The compressed content of a part, kept to be reused by later saves.
+
+    Whatever the content of the part is rendered from sets dirty when it
+    changes. The content is reused as long as dirty isn't set and it was
+    compressed with the same settings.
+    """
+
+    __slots__ = 'dirty', 'settings', 'entry'
+
+    def __init__(self):
+        self.dirty = True
+        self.settings = None
+        self.entry = None
+
+    def valid(self, compression, compresslevel):
+        return (
+            not self.dirty
+            and self.entry is not None
+            and self.settings == (compression, compresslevel)
+        )
+
+    def store(self, compression, compresslevel, entry):
+        self.dirty = False
+        self.settings = (compression, compresslevel)
+        self.entry = entry
+
+    def copy(self):
+        cache = PartCache()
+        cache.dirty, cache.settings, cache.entry = self.dirty, self.settings, self.entry
+        return cache
+
+
+class PackagePart:
+    """A part in a Package.
+
+    The content of the part is produced by calling ``write`` with a binary
+    file-like object, unless its PartCache holds it already.
+    """
+
+    def __init__(self, kind, name, write, stream=False, cache=None):
+        self.kind = kind
+        self.name = name
+        self.write = write
+        self.stream = stream
+        self.cache = cache
+        self.relationships = []
+
+    @property
+    def base(self):
+        return posixpath.dirname(self.name)
+
+    @property
+    def rels_name(self):
+        base, item = posixpath.split(self.name)
+        return posixpath.join(base, '_rels', '%s.rels' % item)
+
+    def relate(self, part, id=None):
+        """Relate this part to the supplied part."""
+        return _relate(self, part, id)
+
+
+class Package:
+    """An OOXML package that is written directly to a zip archive.
+
+    Parts and relationships are declared up front with ``add`` and
+    ``relate``; ``save`` then writes the content types, the relationship
+    parts and the parts themselves.
+    """
+
+    base = '/'
+    rels_name = '/_rels/.rels'
+
+    def __init__(self):
+        self.parts = []
+        self.relationships = []
+
+    def add(self, kind, name, write, stream=False, cache=None):
+        """Add a part to the package and return it.
+
+        kind is a part class providing ``content_type`` and ``rel_type``
+        (see xlsxcessive.parts). write is a callable that writes the part
+        content to a binary stream. Parts that may grow very large should
+        pass stream=True so their zip entry allows for ZIP64 sizes; stream
+        may also be a callable, called just before the part is written,
+        returning whether the part needs them. If a PartCache is given, the
+        compressed content is kept in it, and written from it instead while
+        it's valid.
+        """
+        part = PackagePart(kind, name, write, stream, cache)
+        self.parts.append(part)
+        return part
+
+    def relate(self, part, id=None):
+        """Relate the package to the supplied part."""
+        return _relate(self, part, id)
+
+    def save(self, target, compression=ZIP_DEFLATED, compresslevel=None, threads=None):
+        """Save the package to target, a filename or binary file-like object.
+
+        compression is zipfile.ZIP_DEFLATED or zipfile.ZIP_STORED and
+        compresslevel a zlib compression level. Large parts are deflated
+        in chunks on up to threads threads.
+        """
+        with ZipWriter(target, compression, compresslevel, threads) as zf:
+            zf.write_entry('[Content_Types].xml', self._content_types().encode())
+            for source in [self, *self.parts]:
+                if source.relationships:
+                    rels = _relationships_xml(source.relationships).encode()
+                    zf.write_entry(source.rels_name.lstrip('/'), rels)
+            for part in self.parts:
+                name = part.name.lstrip('/')
+                cache = part.cache
+                if cache is not None and cache.valid(compression, compresslevel):
+                    zf.write_compressed(name, cache.entry)
+                    continue
+                capture = cache is not None
+                stream = part.stream() if callable(part.stream) else part.stream
+                with zf.open_entry(name, stream, capture) as entry:
+                    part.write(entry)
+                if capture:
+                    cache.store(compression, compresslevel, entry.compressed())
+
+    def _content_types(self):
+        defaults = markup.content_type_default % {
+            'extension': 'rels',
+            'content_type': RELATIONSHIPS_CONTENT_TYPE,
+        }
+        overrides = ''.join(
+            markup.content_type_override
+            % {'name': part.name, 'content_type': part.kind.content_type}
+            for part in self.parts
+        )
+        return markup.content_types % {'defaults': defaults, 'overrides': overrides}
+
+
+def _relate(source, part, id):
+    if id is None:
+        id = 'd%d' % (len(source.relationships) + 1)
+    target = posixpath.relpath(part.name, source.base)
+    source.relationships.append((id, part.kind.rel_type, target))
+    return id
+
+
+def _relationships_xml(relationships):
+    rels = ''.join(
+        markup.relationship % {'id': id, 'type': type, 'target': target}
+        for id, type, target in relationships
+    )
+    return markup.relationships % {'relationships': rels}
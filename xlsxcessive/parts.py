@@ -1,4 +1,13 @@
-from openpack.basepack import Part
+"""The kinds of parts making up an xlsx package."""
+
+
+class Part:
+    """A kind of part, by its content type and the type of the relationship
+    pointing at it (see Package.add).
+    """
+
+    content_type = None
+    rel_type = None
 
 
 class WorkbookPart(Part):
@@ -29,3 +38,14 @@ class StylesPart(Part):
     rel_type = (
         "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
     )
+
+
+class SharedStringsPart(Part):
+    content_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+    )
+
+    rel_type = (
+        "http://schemas.openxmlformats.org/officeDocument/2006"
+        "/relationships/sharedStrings"
+    )
@@ -0,0 +1,265 @@
+"""Reading back the rows of xlsx packages.
+
+A Reader opens a package and iterates over the rows of one worksheet at a
+time. The worksheet XML is parsed incrementally and each row is dropped
+once it has been handed out, so memory use doesn't grow with the number
+of rows (the shared strings table, if any, is loaded up front)::
+
+    with Reader('report.xlsx') as reader:
+        for row in reader.rows('Orders'):
+            for cell in row.cells:
+                print(cell.reference, cell.value)
+
+Cell values are converted back to Python values: numbers to int or float,
+shared and inline strings to str, booleans to bool. Numbers styled with a
+date or time number format become dates, datetimes or times, in the date
+system of the workbook. Formula cells hold the value saved with them, and
+formula the text of the formula; cells sharing a formula other than its
+first one have an empty formula, as the package only holds the formula of
+the first.
+"""
+
+from __future__ import annotations
+
+import datetime
+import posixpath
+import re
+import zipfile
+from typing import Any, NamedTuple
+from xml.etree import ElementTree
+
+from xlsxcessive.dates import DateSerializer
+from xlsxcessive.reference import a1_to_coords, coords_to_a1
+from xlsxcessive.style import Format
+
+
+class ReadRow(NamedTuple):
+    number: int
+    cells: list[ReadCell]
+
+
+class ReadCell(NamedTuple):
+    reference: str
+    value: Any
+    formula: str | None
+    style: int
+
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIPS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_TYPES = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+
+_SHEET_DATA, _ROW, _C, _V, _F, _IS, _T, _R, _SI = (
+    _MAIN + tag for tag in ('sheetData', 'row', 'c', 'v', 'f', 'is', 't', 'r', 'si')
+)
+
+# The built-in number formats, by id
+_BUILTIN_FORMATS = {
+    **{numid: code for code, numid in Format.COMMON_NUM_FORMATS.items()},
+    45: 'mm:ss',
+    46: '[h]:mm:ss',
+    47: 'mm:ss.0',
+}
+
+# Quoted text, escaped characters, [colors] and [conditions], and padding
+_LITERALS = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]|[_*].')
+
+
+class Reader:
+    def __init__(self, source):
+        """Open the package source, a filename or binary file-like object."""
+        self._zip = zipfile.ZipFile(source)
+        (workbook,) = self._related('', 'officeDocument')
+        root = self._parse(workbook)
+        properties = root.find(_MAIN + 'workbookPr')
+        date1904 = None if properties is None else properties.get('date1904')
+        self.date1904 = date1904 in ('true', '1')
+        self._dates = DateSerializer(self.date1904)
+        targets = self._relationships(workbook)
+        # The worksheet parts by sheet name, in workbook order
+        self._sheets = {
+            sheet.get('name'): targets[sheet.get(_R_ID)][1]
+            for sheet in root.iter(_MAIN + 'sheet')
+        }
+        styles = self._related(workbook, 'styles')
+        self._date_kinds = self._read_date_kinds(styles[0]) if styles else ()
+        strings = self._related(workbook, 'sharedStrings')
+        self._shared_strings = self._read_shared_strings(strings[0]) if strings else []
+
+    @property
+    def sheet_names(self):
+        return list(self._sheets)
+
+    def rows(self, sheet=0):
+        """Generate the rows of a worksheet as ReadRows.
+
+        sheet is the name or 0-based index of the worksheet. Each ReadRow
+        holds its 1-based number and a list of ReadCells, each with its A1
+        reference, value, formula (or None) and style index. Empty rows
+        aren't always saved, so row numbers may skip.
+        """
+        part = self._sheet_part(sheet)
+        with self._zip.open(part) as stream:
+            sheet_data = None
+            number = 0
+            for event, elem in ElementTree.iterparse(stream, ('start', 'end')):
+                if event == 'start':
+                    if elem.tag == _SHEET_DATA:
+                        sheet_data = elem
+                    continue
+                if elem.tag == _ROW:
+                    number = int(elem.get('r') or number + 1)
+                    yield ReadRow(number, self._cells(elem, number))
+                    # Drop the rows handed out.
+                    sheet_data.clear()
+
+    def _sheet_part(self, sheet):
+        names = self.sheet_names
+        if isinstance(sheet, int):
+            if not -len(names) <= sheet < len(names):
+                raise ValueError("No worksheet at index %d" % sheet)
+            sheet = names[sheet]
+        if sheet not in self._sheets:
+            raise ValueError("No worksheet named %r" % sheet)
+        return self._sheets[sheet]
+
+    def _cells(self, row, number):
+        cells = []
+        reference = None
+        for c in row.iter(_C):
+            if c.get('r'):
+                reference = c.get('r')
+            else:
+                col = a1_to_coords(reference)[1] + 1 if reference else 0
+                reference = coords_to_a1((number - 1, col))
+            style = int(c.get('s') or 0)
+            f = c.find(_F)
+            formula = None if f is None else f.text or ''
+            cells.append(ReadCell(reference, self._value(c, style), formula, style))
+        return cells
+
+    def _value(self, c, style):
+        kind = c.get('t') or 'n'
+        if kind == 'inlineStr':
+            inline = c.find(_IS)
+            return None if inline is None else _text(inline)
+        v = c.find(_V)
+        if v is None or v.text is None:
+            return None
+        text = v.text
+        if kind == 'n':
+            value = _number(text)
+            kinds = self._date_kinds
+            date_kind = kinds[style] if style < len(kinds) else None
+            if date_kind is datetime.date:
+                return self._dates.to_date(value)
+            if date_kind is datetime.datetime:
+                return self._dates.to_datetime(value)
+            if date_kind is datetime.time:
+                return self._dates.to_time(value)
+            return value
+        if kind == 's':
+            return self._shared_strings[int(text)]
+        if kind == 'b':
+            return text == '1'
+        if kind == 'd':
+            return datetime.datetime.fromisoformat(text.rstrip('Z'))
+        # str (the result of a formula) and e (an error)
+        return text
+
+    def _read_date_kinds(self, part):
+        """Return, by style index, the type a number styled with it reads as:
+        datetime.date, datetime.datetime, datetime.time or None.
+        """
+        root = self._parse(part)
+        codes = dict(_BUILTIN_FORMATS)
+        for numfmt in root.iter(_MAIN + 'numFmt'):
+            codes[int(numfmt.get('numFmtId'))] = numfmt.get('formatCode')
+        xfs = root.find(_MAIN + 'cellXfs')
+        if xfs is None:
+            return ()
+        kinds = []
+        for xf in xfs.iter(_MAIN + 'xf'):
+            code = codes.get(int(xf.get('numFmtId') or 0))
+            kinds.append(_date_kind(code) if code else None)
+        return tuple(kinds)
+
+    def _read_shared_strings(self, part):
+        strings = []
+        with self._zip.open(part) as stream:
+            for _, elem in ElementTree.iterparse(stream):
+                if elem.tag == _SI:
+                    strings.append(_text(elem))
+                    elem.clear()
+        return strings
+
+    def _parse(self, part):
+        with self._zip.open(part) as stream:
+            return ElementTree.parse(stream).getroot()
+
+    def _relationships(self, part):
+        """Return the (type, target part) of the relationships of part, by id."""
+        folder, name = posixpath.split(part)
+        rels = posixpath.join(folder, '_rels', name + '.rels')
+        if rels not in self._zip.namelist():
+            return {}
+        relationships = {}
+        for rel in self._parse(rels).iter(_RELATIONSHIPS + 'Relationship'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            relationships[rel.get('Id')] = rel.get('Type'), target
+        return relationships
+
+    def _related(self, part, kind):
+        """Return the parts related to part with relationships of kind."""
+        return [
+            target
+            for rel_type, target in self._relationships(part).values()
+            if rel_type == _TYPES + kind
+        ]
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _text(elem):
+    """Return the text of a string item, joining its runs."""
+    parts = []
+    for child in elem:
+        if child.tag == _T:
+            parts.append(child.text or '')
+        elif child.tag == _R:
+            parts.extend(t.text or '' for t in child.iter(_T))
+    return ''.join(parts)
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _date_kind(code):
+    """Return the type of the values shown by the number format code."""
+    # Only the first section formats positive numbers.
+    code = _LITERALS.sub('', code).lower().split(';')[0]
+    has_time = 'h' in code or 's' in code
+    has_date = 'y' in code or 'd' in code or ('m' in code and not has_time)
+    if has_date and has_time:
+        return datetime.datetime
+    if has_date:
+        return datetime.date
+    if has_time:
+        return datetime.time
+    return None
@@ -0,0 +1,128 @@
+"""Conversion between A1 style references and 0-based coordinates.
+
+Coordinates are (row, column) tuples, like those of Cell.coords. The names
+of all the columns Excel supports are computed once, so converting either
+way is a table lookup:
+
+>>> coords_to_a1((0, 27))
+'AB1'
+>>> a1_to_coords('XFD1048576')
+(1048575, 16383)
+>>> range_to_coords('A1:C10')
+((0, 0), (9, 2))
+>>> coords_to_range((0, 0), (9, 2))
+'A1:C10'
+
+Columns beyond XFD are computed (and cached) on demand.
+"""
+
+import string
+
+from xlsxcessive.cache import CacheDecorator
+
+# The number of columns in an Excel worksheet, A to XFD
+MAX_COLUMNS = 16384
+
+_DIGITS = string.digits
+
+
+def _compute_column_name(col):
+    letters = []
+    col += 1
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters.append(chr(65 + rem))
+    return ''.join(reversed(letters))
+
+
+def _compute_column_index(letters):
+    col = 0
+    for letter in letters:
+        col = col * 26 + ord(letter) - 64
+    return col - 1
+
+
+COLUMN_NAMES = tuple(_compute_column_name(col) for col in range(MAX_COLUMNS))
+COLUMN_INDEXES = {name: col for col, name in enumerate(COLUMN_NAMES)}
+
+
+@CacheDecorator(maxsize=4096)
+def _column_name_beyond(col):
+    if col < 0:
+        raise ValueError("Invalid column index: %r" % col)
+    return _compute_column_name(col)
+
+
+@CacheDecorator(maxsize=4096)
+def _column_index_beyond(letters):
+    if not letters or not letters.isalpha() or not letters.isupper():
+        raise ValueError("Invalid column name: %r" % letters)
+    return _compute_column_index(letters)
+
+
+def column_name(col):
+    """Return the letters of the column with 0-based index col."""
+    if 0 <= col < MAX_COLUMNS:
+        return COLUMN_NAMES[col]
+    return _column_name_beyond(col)
+
+
+def column_index(letters):
+    """Return the 0-based index of the column named letters."""
+    try:
+        return COLUMN_INDEXES[letters]
+    except KeyError:
+        return _column_index_beyond(letters)
+
+
+def coords_to_a1(coords):
+    """Return the A1 style reference of (row, col) coordinates."""
+    row, col = coords
+    if 0 <= col < MAX_COLUMNS:
+        return '%s%d' % (COLUMN_NAMES[col], row + 1)
+    return '%s%d' % (_column_name_beyond(col), row + 1)
+
+
+def a1_to_coords(reference):
+    """Return the (row, col) coordinates of an A1 style reference.
+
+    Absolute references ($A$1) are accepted.
+    """
+    if '$' in reference:
+        reference = reference.replace('$', '')
+    letters = reference.rstrip(_DIGITS)
+    digits = reference[len(letters) :]
+    if not digits:
+        raise ValueError("Invalid cell reference: %r" % reference)
+    return int(digits) - 1, column_index(letters)
+
+
+def coords_to_range(start, end):
+    """Return the A1 style range spanning two (row, col) coordinates."""
+    return '%s:%s' % (coords_to_a1(start), coords_to_a1(end))
+
+
+def range_to_coords(cell_range):
+    """Return the (start, end) coordinates of an A1 style range.
+
+    A single reference is a range of one cell.
+    """
+    first, sep, last = cell_range.partition(':')
+    start = a1_to_coords(first)
+    return start, a1_to_coords(last) if sep else start
+
+
+def coords_to_a1_many(coords):
+    """Return the A1 style references of a sequence of coordinates."""
+    names = COLUMN_NAMES
+    return [
+        '%s%d' % (names[col], row + 1)
+        if 0 <= col < MAX_COLUMNS
+        else coords_to_a1((row, col))
+        for row, col in coords
+    ]
+
+
+def a1_to_coords_many(references):
+    """Return the coordinates of a sequence of A1 style references."""
+    return [a1_to_coords(reference) for reference in references]
@@ -0,0 +1,116 @@
+"""Writing XML as UTF-8 bytes.
+
+Workbooks, worksheets, rows, cells, formulas, stylesheets and shared
+strings render themselves through render_to, which writes their XML to a
+binary file-like object or a bytearray::
+
+    with open('sheet1.xml', 'wb') as stream:
+        worksheet.render_to(stream)
+
+The text is buffered and encoded a large chunk at a time; nested objects
+write into the same buffer rather than returning strings to be joined.
+str() of those objects renders them the same way.
+"""
+
+import codecs
+
+CHUNK_SIZE = 2**16
+
+
+class Utf8Writer:
+    """Buffers text and writes it as UTF-8 to target in large chunks.
+
+    target is a binary file-like object or a bytearray. written counts the
+    bytes written to it so far.
+    """
+
+    def __init__(self, target, chunk_size=CHUNK_SIZE):
+        if isinstance(target, bytearray):
+            self._output = target.extend
+        else:
+            self._output = target.write
+        self.chunk_size = chunk_size
+        self.written = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def writelines(self, texts):
+        append = self._buffer.append
+        buffered = self._buffered
+        for text in texts:
+            append(text)
+            buffered += len(text)
+        self._buffered = buffered
+        if buffered >= self.chunk_size:
+            self.flush()
+
+    def write_bytes(self, data):
+        """Write encoded data after the text written so far."""
+        self.flush()
+        self._output(data)
+        self.written += len(data)
+
+    def flush(self):
+        if self._buffer:
+            data = ''.join(self._buffer).encode('utf-8')
+            self._buffer.clear()
+            self._buffered = 0
+            self._output(data)
+            self.written += len(data)
+
+
+class _TextWriter:
+    """Collects the text of an object rendered by str()."""
+
+    __slots__ = 'parts', 'write', 'writelines', '_decoder'
+
+    def __init__(self):
+        self.parts = []
+        self.write = self.parts.append
+        self.writelines = self.parts.extend
+        self._decoder = None
+
+    def write_bytes(self, data):
+        if self._decoder is None:
+            # Bytes may end in the middle of a character.
+            self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.write(self._decoder.decode(data))
+
+
+class Renderable:
+    """Base of the objects rendering their XML with _write_xml(out).
+
+    out has the methods of a Utf8Writer.
+    """
+
+    __slots__ = ()
+
+    def render_to(self, target):
+        """Write the XML of this object as UTF-8 to target.
+
+        target is a binary file-like object, a bytearray or a Utf8Writer.
+        Returns the number of bytes written.
+        """
+        if isinstance(target, Utf8Writer):
+            before = target.written
+            self._write_xml(target)
+            target.flush()
+            return target.written - before
+        out = Utf8Writer(target)
+        self._write_xml(out)
+        out.flush()
+        return out.written
+
+    def _write_xml(self, out):
+        raise NotImplementedError
+
+    def __str__(self):
+        out = _TextWriter()
+        self._write_xml(out)
+        return ''.join(out.parts)
@@ -0,0 +1,61 @@
+import sys
+
+from xlsxcessive import markup, memory
+from xlsxcessive.package import PartCache
+from xlsxcessive.render import Renderable
+from xlsxcessive.stats import active as active_stats
+
+
+class SharedStrings(Renderable):
+    """The shared strings table of a workbook.
+
+    Each distinct string is stored once; cells refer to it by index.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+        # The bytes held by the strings (see memory_usage)
+        self._text_bytes = 0
+        # The content saved last time, reused until a string is added
+        self._part_cache = PartCache()
+
+    def add(self, text):
+        """Intern text (an XML escaped string) and return its index."""
+        try:
+            return self.index[text]
+        except KeyError:
+            pass
+        idx = self.index[text] = len(self.strings)
+        self.strings.append(text)
+        self._text_bytes += sys.getsizeof(text)
+        self._part_cache.dirty = True
+        return idx
+
+    def copy(self):
+        """Return a new table holding the same strings."""
+        table = SharedStrings()
+        table.strings = list(self.strings)
+        table.index = dict(self.index)
+        table._text_bytes = self._text_bytes
+        return table
+
+    def memory_usage(self, deep=False):
+        """Estimate the bytes held by this table.
+
+        The size of the strings is kept up to date as they are added; if
+        deep is True, they are measured again.
+        """
+        size = sys.getsizeof(self.strings) + sys.getsizeof(self.index)
+        if deep:
+            return size + memory.sizeof_all(self.strings)
+        return size + self._text_bytes
+
+    def __len__(self):
+        return len(self.strings)
+
+    def _write_xml(self, out):
+        with active_stats().phase('shared_strings'):
+            out.write(markup.shared_strings_head % {'unique_count': len(self.strings)})
+            out.writelines('<si><t>%s</t></si>' % text for text in self.strings)
+            out.write(markup.shared_strings_tail)
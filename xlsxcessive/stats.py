@@ -0,0 +1,150 @@
+"""Opt-in instrumentation of workbook saving.
+
+Pass a SaveStats (or a callback taking one) as the stats argument of
+xlsx.save, or collect the stats of any rendering code::
+
+    stats = SaveStats()
+    with stats.collecting():
+        str(worksheet)
+    logger.info("rendered: %s", stats)
+
+While stats are collected, the rendering code times its phases, counts
+the bytes emitted per worksheet and the cells by type, and the hit rates
+of the caches are recorded. Phase times are exclusive: the time of a
+phase nested in another one (compressing the output of a worksheet, say)
+only counts towards the inner phase.
+
+Outside of collecting(), the rendering code reports to NULL_STATS, which
+does nothing.
+"""
+
+import collections
+import contextlib
+import contextvars
+import time
+
+from xlsxcessive import cache
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullStats:
+    """Stats that aren't collected."""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def sheet(self, name, **values):
+        pass
+
+
+NULL_STATS = NullStats()
+
+_active = contextvars.ContextVar('xlsxcessive_stats', default=NULL_STATS)
+
+
+def active():
+    """Return the stats being collected, or NULL_STATS."""
+    return _active.get()
+
+
+class _Phase:
+    __slots__ = 'stats', 'name', 'start', 'nested'
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.stats._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.stats._stack
+        stack.pop()
+        self.stats.phases[self.name] += elapsed - self.nested
+        if stack:
+            stack[-1].nested += elapsed
+
+
+class SaveStats:
+    """Timings and counters of a save.
+
+    phases holds the seconds spent per phase, sheets the values reported
+    per worksheet (bytes, cells by type) and caches the hits and misses of
+    each cache while collecting, with their hit rate.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases = collections.defaultdict(float)
+        self.sheets = collections.defaultdict(dict)
+        self.caches = {}
+        self._stack = []
+
+    def phase(self, name):
+        """Return a context manager timing the phase name."""
+        return _Phase(self, name)
+
+    def sheet(self, name, **values):
+        """Record values for the worksheet name."""
+        self.sheets[name].update(values)
+
+    @contextlib.contextmanager
+    def collecting(self):
+        """Make this the active stats within the with block."""
+        before = cache.cache_info()
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+            self._record_caches(before, cache.cache_info())
+
+    def _record_caches(self, before, after):
+        for name, info in after.items():
+            start = before.get(name)
+            hits = info.hits - (start.hits if start else 0)
+            misses = info.misses - (start.misses if start else 0)
+            if hits < 0 or misses < 0:
+                # cleared in the meantime
+                hits, misses = info.hits, info.misses
+            if hits or misses:
+                self.caches[name] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses),
+                }
+
+    def as_dict(self):
+        return {
+            'phases': dict(self.phases),
+            'sheets': {name: dict(values) for name, values in self.sheets.items()},
+            'caches': dict(self.caches),
+        }
+
+    def __str__(self):
+        phases = ', '.join(
+            '%s %.3fs' % (name, seconds)
+            for name, seconds in sorted(self.phases.items(), key=lambda item: -item[1])
+        )
+        sheets = ', '.join(
+            '%s %d bytes' % (name, values.get('bytes', 0))
+            for name, values in self.sheets.items()
+        )
+        return 'phases: %s; sheets: %s' % (phases or '-', sheets or '-')
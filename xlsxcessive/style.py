@@ -1,18 +1,85 @@
+import collections
+import sys
+from typing import NamedTuple
 from xml.sax.saxutils import escape
 
-from xlsxcessive import markup
+from xlsxcessive import markup, memory
 from xlsxcessive import errors
+from xlsxcessive.package import PartCache
+from xlsxcessive.render import Renderable
+from xlsxcessive.stats import active as active_stats
 
 
-class Stylesheet:
+class StyleStats(NamedTuple):
+    fonts: int
+    borders: int
+    formats: int
+    duplicate_fonts: int
+    duplicate_borders: int
+    duplicate_formats: int
+
+
+class Stylesheet(Renderable):
+    """The styles of a Workbook.
+
+    Fonts, borders and formats are interned by their XML: equal
+    definitions share a single entry (and index) in the stylesheet. Fonts
+    and borders are interned when they are created. Formats can change
+    after their creation, so a Format gets its index when it is first
+    asked for one; all the formats waiting for an index are then interned
+    in the order they were created.
+    """
+
     CUSTOM_NUM_OFFSET = 100
 
-    def __init__(self, workbook):
+    # The containers holding the styles, copied by _writable
+    _CONTAINERS = (
+        'fonts',
+        'formats',
+        'borders',
+        'custom_numbers',
+        '_font_ids',
+        '_border_ids',
+        '_xfs',
+        '_xf_ids',
+        '_duplicates',
+    )
+
+    def __init__(self, workbook, base=None):
+        """Create the Stylesheet of workbook.
+
+        If base is a frozen Stylesheet (see WorkbookTemplate), the styles
+        of base are shared until this Stylesheet changes; its Formats can
+        be used, but not changed.
+        """
         self.workbook = workbook
+        # Whether changes are refused, and the Stylesheet shared until then
+        self._frozen = False
+        self._base = base
+        if base is not None:
+            for name in self._CONTAINERS:
+                setattr(self, name, getattr(base, name))
+            self._pending = []
+            self._part_cache = base._part_cache.copy()
+            self.default_date_format = base.default_date_format
+            self.default_datetime_format = base.default_datetime_format
+            self.default_time_format = base.default_time_format
+            return
         self.fonts = []
+        # All the Formats created, including duplicates
         self.formats = []
         self.borders = []
         self.custom_numbers = {}
+        self._font_ids = {}
+        self._border_ids = {}
+        # The distinct cellXfs entries and their indexes by XML
+        self._xfs = []
+        self._xf_ids = {}
+        # Formats without an index yet
+        self._pending = []
+        self._duplicates = collections.Counter()
+        # The content saved last time, reused until a style changes
+        self._part_cache = PartCache()
         self._init_defaults()
 
     def _init_defaults(self):
@@ -29,32 +96,101 @@ class Stylesheet:
         self.default_time_format.number_format('h:mm:ss')
 
     def border(self, **params):
-        border = Border(**params)
-        self.borders.append(border)
-        border.index = self.borders.index(border)
-        return border
+        return self._intern(Border(**params), 'borders', '_border_ids')
 
     def font(self, **params):
-        font = Font(**params)
-        self.fonts.append(font)
-        font.index = self.fonts.index(font)
-        return font
+        return self._intern(Font(**params), 'fonts', '_font_ids')
+
+    def _writable(self):
+        """Get ready for a change of the styles."""
+        if self._frozen:
+            raise errors.XlsxFormatError("The styles of a template can't be changed")
+        if self._base is not None:
+            for name in self._CONTAINERS:
+                setattr(self, name, getattr(self, name).copy())
+            self._base = None
+
+    def _freeze(self):
+        """Refuse changes from now on, so that the styles can be shared."""
+        self._intern_formats()
+        self._frozen = True
+
+    def _intern(self, style, styles, ids):
+        """Return the interned equivalent of a Font or Border."""
+        self._writable()
+        styles, ids = getattr(self, styles), getattr(self, ids)
+        key = str(style)
+        index = ids.get(key)
+        if index is not None:
+            self._duplicates[type(style)] += 1
+            return styles[index]
+        style.index = ids[key] = len(styles)
+        styles.append(style)
+        self._part_cache.dirty = True
+        return style
 
     def new_format(self):
+        self._writable()
         f = Format(self)
         self.formats.append(f)
-        f.index = self.formats.index(f)
+        self._pending.append(f)
+        self._part_cache.dirty = True
         return f
 
+    def _intern_formats(self):
+        """Give each pending Format the index of its cellXfs entry."""
+        if self._pending:
+            self._writable()
+        for f in self._pending:
+            if f._index is not None:
+                continue
+            key = str(f)
+            index = self._xf_ids.get(key)
+            if index is None:
+                index = self._xf_ids[key] = len(self._xfs)
+                self._xfs.append(key)
+            else:
+                self._duplicates[Format] += 1
+            f._index = index
+        self._pending.clear()
+
+    def memory_usage(self):
+        """Estimate the bytes held by the styles of this Stylesheet."""
+        styles = [*self.fonts, *self.borders, *self.formats]
+        size = memory.sizeof_all(styles)
+        size += sum(sys.getsizeof(vars(style)) for style in styles)
+        size += memory.sizeof_all((self._xfs, self._xf_ids, self.custom_numbers))
+        return size + memory.sizeof_all(self._xfs)
+
+    def stats(self):
+        """Return the number of distinct fonts, borders and formats, and
+        the number of duplicates of each that were collapsed.
+        """
+        self._intern_formats()
+        return StyleStats(
+            len(self.fonts),
+            len(self.borders),
+            len(self._xfs),
+            self._duplicates[Font],
+            self._duplicates[Border],
+            self._duplicates[Format],
+        )
+
     def add_custom_number_format(self, formatstring):
         """formatstring should be an XML escaped string."""
         if formatstring in self.custom_numbers:
             return self.custom_numbers[formatstring]
+        self._writable()
         numid = self.CUSTOM_NUM_OFFSET + len(self.custom_numbers)
         self.custom_numbers[formatstring] = numid
+        self._part_cache.dirty = True
         return numid
 
-    def __str__(self):
+    def _write_xml(self, out):
+        with active_stats().phase('styles'):
+            out.write(self._render())
+
+    def _render(self):
         numfmts = ''
         fonts = ''
         formats = ''
@@ -70,9 +206,10 @@ class Stylesheet:
             fxml = "\n".join(str(f) for f in self.fonts)
             fcount = len(self.fonts)
             fonts = '<fonts count="%d">%s</fonts>' % (fcount, fxml)
-        if self.formats:
-            fxml = "\n".join(str(f) for f in self.formats)
-            fcount = len(self.formats)
+        self._intern_formats()
+        if self._xfs:
+            fxml = "\n".join(self._xfs)
+            fcount = len(self._xfs)
             formats = '<cellXfs count="%d">%s</cellXfs>' % (fcount, fxml)
         if self.borders:
             bxml = "\n".join(str(b) for b in self.borders)
@@ -122,29 +259,49 @@ class Format:
         self._border = None
         self._alignment = None
         self._number_format = None
-        self.index = None
+        self._index = None
+
+    @property
+    def index(self):
+        """The index of the cellXfs entry of this format."""
+        if self._index is None:
+            self.stylesheet._intern_formats()
+        return self._index
+
+    def _changed(self):
+        """Get ready for a change of this Format."""
+        stylesheet = self.stylesheet
+        stylesheet._writable()
+        stylesheet._part_cache.dirty = True
+        if self._index is not None:
+            self._index = None
+            stylesheet._pending.append(self)
+            # The cells with this format may have to refer to another index.
+            if stylesheet.workbook is not None:
+                for sheet in stylesheet.workbook.sheets:
+                    sheet.mark_dirty()
 
     def font(self, **params):
+        self._changed()
         self._font = self.stylesheet.font(**params)
 
     def border(self, **params):
+        self._changed()
         self._border = self.stylesheet.border(**params)
 
     def align(self, value):
         if value not in self.VALID_ALIGNMENTS:
             msg = "%r is not a valid alignment value." % value
             raise errors.XlsxFormatError(msg)
+        self._changed()
         self._alignment = value
 
     def number_format(self, fmt):
         fmt = escape(fmt, {'"': "&quot;"})
-        all_formats = {}
-        all_formats.update(self.COMMON_NUM_FORMATS)
-        all_formats.update(self.stylesheet.custom_numbers)
-        if fmt not in all_formats:
+        self._changed()
+        fmtid = self.COMMON_NUM_FORMATS.get(fmt)
+        if fmtid is None:
             fmtid = self.stylesheet.add_custom_number_format(fmt)
-        else:
-            fmtid = all_formats[fmt]
         self._number_format = fmtid
 
     def __str__(self):
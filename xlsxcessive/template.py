@@ -0,0 +1,101 @@
+"""Starting workbooks from a prebuilt skeleton.
+
+Workbooks generated again and again with the same styles, column widths
+and header rows can be copied from a template instead of being built from
+scratch each time::
+
+    skeleton = Workbook()
+    bold = skeleton.stylesheet.new_format()
+    bold.font(bold=True)
+    sheet = skeleton.new_sheet('Orders')
+    sheet.col(number=1, width=30)
+    sheet.row(1).cell('A1', value='Customer', format=bold)
+    ORDERS = WorkbookTemplate(skeleton)
+
+    def export(orders):
+        workbook = ORDERS.instantiate()
+        workbook.sheets[0].append_rows(orders)
+        save(workbook, 'orders.xlsx')
+
+The rows of the template are rendered once and shared by its instances,
+which merge them with their own rows when saved. The stylesheet is shared
+too, and only copied by an instance adding styles of its own; until then,
+its styles part is saved from the compressed copy kept by the template.
+
+The template takes over the workbook it is created from: the Formats of
+that workbook can still be used by the instances, but not changed. Cells
+added by an instance to the rows of the template are rendered with the
+template cells of their row, and the shared formulas of the template
+can't be extended (ValueError is raised).
+"""
+
+import copy
+import io
+
+from xlsxcessive.workbook import Workbook
+from xlsxcessive.worksheet import Worksheet
+from xlsxcessive.zipwriter import ZIP_DEFLATED, ZipWriter
+
+
+class WorkbookTemplate:
+    def __init__(self, workbook, compression=ZIP_DEFLATED, compresslevel=None):
+        """Create a template copying workbook.
+
+        Only regular worksheets can be copied; ValueError is raised for
+        streaming and spilling ones. The styles part is compressed with
+        compression and compresslevel, the settings the instances are
+        expected to be saved with.
+        """
+        for sheet in workbook.sheets:
+            if type(sheet) is not Worksheet:
+                msg = "Worksheet %r can't be part of a template" % sheet.name
+                raise ValueError(msg)
+        stylesheet = workbook.stylesheet
+        stylesheet._freeze()
+        cache = stylesheet._part_cache
+        if not cache.valid(compression, compresslevel):
+            entry = _compress(stylesheet, compression, compresslevel)
+            cache.store(compression, compresslevel, entry)
+        self.stylesheet = stylesheet
+        self.shared_strings = None
+        if workbook.shared_strings is not None:
+            self.shared_strings = workbook.shared_strings.copy()
+        self.date1904 = workbook.date1904
+        self.sheets = [_SheetTemplate(sheet) for sheet in workbook.sheets]
+
+    def instantiate(self, **params):
+        """Return a new Workbook starting as a copy of this template.
+
+        params (max_memory, cache_parts) are passed on to Workbook.
+        """
+        return Workbook(template=self, **params)
+
+    def _add_sheets(self, workbook):
+        for template in self.sheets:
+            sheet = workbook.new_sheet(template.name)
+            sheet.cols = [copy.copy(col) for col in template.cols]
+            sheet.formulas = list(template.formulas)
+            sheet.max_row = template.max_row
+            sheet._base_records = template.records
+
+
+class _SheetTemplate:
+    """The parts of a Worksheet shared by the instances of a template."""
+
+    def __init__(self, sheet):
+        self.name = sheet.name
+        self.cols = [copy.copy(col) for col in sheet.cols]
+        # Shared formulas keep their index, so instances number theirs after.
+        self.formulas = tuple(sheet.formulas)
+        for formula in self.formulas:
+            formula._freeze()
+        self.max_row = sheet.max_row
+        self.records = sheet._records()
+
+
+def _compress(stylesheet, compression, compresslevel):
+    """Return the CompressedEntry of the styles part of stylesheet."""
+    with ZipWriter(io.BytesIO(), compression, compresslevel, threads=1) as zf:
+        with zf.open_entry('styles.xml', capture=True) as entry:
+            stylesheet.render_to(entry)
+    return entry.compressed()
@@ -1,28 +1,151 @@
-from xlsxcessive import markup
+from xlsxcessive import errors, markup, memory
+from xlsxcessive.dates import DateSerializer
+from xlsxcessive.render import Renderable
+from xlsxcessive.sharedstrings import SharedStrings
+from xlsxcessive.stats import active as active_stats
 from xlsxcessive.style import Stylesheet, Format
-from xlsxcessive.worksheet import Worksheet
+from xlsxcessive.worksheet import SpillingWorksheet, StreamingWorksheet, Worksheet
 
 
-class Workbook:
-    def __init__(self):
+class Workbook(Renderable):
+    def __init__(
+        self, shared_strings=False, max_memory=None, cache_parts=False, template=None
+    ):
+        """Creates a new Workbook.
+
+        If shared_strings is True, string cell values are stored once in
+        a shared strings table and cells refer to them by index. This
+        shrinks workbooks that repeat the same strings many times.
+
+        max_memory is an optional budget in bytes; see the max_memory
+        property.
+
+        If cache_parts is True, saving keeps the compressed content of the
+        worksheets, the stylesheet and the shared strings, and later saves
+        reuse it for those that haven't changed since.
+
+        If template is a WorkbookTemplate (see xlsxcessive.template), the
+        workbook starts as a copy of the template; shared_strings is then
+        taken from the template.
+        """
         self.sheets = []
-        self.stylesheet = Stylesheet(self)
-        self.date1904 = (
-            False  # do not change this value when you already inserted dates!
-        )
+        self.cache_parts = cache_parts
+        if template is None:
+            self.stylesheet = Stylesheet(self)
+            self.shared_strings = SharedStrings() if shared_strings else None
+            self.date1904 = (
+                False  # do not change this value when you already inserted dates!
+            )
+        else:
+            self.stylesheet = Stylesheet(self, base=template.stylesheet)
+            self.shared_strings = None
+            if template.shared_strings is not None:
+                self.shared_strings = template.shared_strings.copy()
+            self.date1904 = template.date1904
+        self._date_serializer = DateSerializer(self.date1904)
+        self._max_memory = None
+        self._memory_estimate = 0
+        if template is not None:
+            template._add_sheets(self)
+        self.max_memory = max_memory
 
-    def new_sheet(self, name):
+    def new_sheet(self, name, streaming=False, spill_rows=None):
+        """Create and return a new Worksheet named name.
+
+        If streaming is True, a write-only StreamingWorksheet is created
+        instead; see that class for the trade-offs. If spill_rows is given,
+        a SpillingWorksheet keeping up to that many rows in memory is
+        created.
+        """
+        if streaming and spill_rows is not None:
+            raise ValueError("A streaming worksheet can't spill rows")
         sid = len(self.sheets) + 1
-        sheet = Worksheet(self, name, sid, "rId%d" % sid)
+        if spill_rows is not None:
+            sheet = SpillingWorksheet(self, name, sid, "rId%d" % sid, spill_rows)
+        else:
+            factory = StreamingWorksheet if streaming else Worksheet
+            sheet = factory(self, name, sid, "rId%d" % sid)
         self.sheets.append(sheet)
+        if self._max_memory is not None:
+            sheet._budget = self
         return sheet
 
+    @property
+    def max_memory(self):
+        """A limit in bytes on the estimated memory held by this workbook.
+
+        Once set, every row, cell and formula added updates a running
+        estimate (starting from memory_usage()), and XlsxMemoryError is
+        raised as soon as it goes over the limit. Rows written out by
+        streaming worksheets or spilled to disk no longer count. None
+        disables the limit.
+        """
+        return self._max_memory
+
+    @max_memory.setter
+    def max_memory(self, limit):
+        self._max_memory = limit
+        budget = None if limit is None else self
+        for sheet in self.sheets:
+            sheet._budget = budget
+        if limit is not None:
+            self._memory_estimate = 0
+            self._grow(self.memory_usage().total)
+
+    def _grow(self, nbytes):
+        self._memory_estimate = max(self._memory_estimate + nbytes, 0)
+        if self._memory_estimate > self._max_memory:
+            raise errors.XlsxMemoryError(self._memory_estimate, self._max_memory)
+
+    def memory_usage(self, deep=False):
+        """Estimate the bytes held by this workbook.
+
+        Returns a MemoryUsage (see xlsxcessive.memory) with the bytes held
+        by rows, cells, formulas, styles and shared strings, and their
+        total. The estimate is kept up to date as the workbook is filled;
+        if deep is True, all the rows and cells are measured instead,
+        which takes time in proportion to the number of cells.
+        """
+        usages = [sheet.memory_usage(deep) for sheet in self.sheets]
+        sheets = memory.combine(usages)
+        strings = self.shared_strings
+        return memory.usage(
+            rows=sheets.rows,
+            cells=sheets.cells,
+            formulas=sheets.formulas,
+            styles=self.stylesheet.memory_usage(),
+            strings=strings.memory_usage(deep) if strings is not None else 0,
+        )
+
+    @property
+    def date_serializer(self):
+        """A DateSerializer for the date system of this workbook."""
+        if self._date_serializer.date1904 != self.date1904:
+            self._date_serializer = DateSerializer(self.date1904)
+        return self._date_serializer
+
     def new_format(self):
         return Format(self)
 
-    def __str__(self):
-        sheet_references = "".join(s.ref for s in self.sheets)
-        return markup.workbook % {
-            'date1904': 'true' if self.date1904 else 'false',
-            'sheets': sheet_references,
-        }
+    def close(self):
+        """Discard the temporary files of streaming and spilling worksheets."""
+        for sheet in self.sheets:
+            if hasattr(sheet, 'close'):
+                sheet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_xml(self, out):
+        with active_stats().phase('workbook'):
+            sheet_references = "".join(s.ref for s in self.sheets)
+            out.write(
+                markup.workbook
+                % {
+                    'date1904': 'true' if self.date1904 else 'false',
+                    'sheets': sheet_references,
+                }
+            )
@@ -1,9 +1,18 @@
 """Classes that represent parts of an OOXML Worksheet."""
 
-import operator
-import string
+import array
+import collections
 import datetime
+import decimal
+import functools
+import heapq
+import itertools
 import numbers
+import operator
+import pickle
+import sys
+import tempfile
+import weakref
 
 try:
     from functools import singledispatchmethod  # type: ignore
@@ -11,59 +20,116 @@ except ImportError:
     from singledispatchmethod import singledispatchmethod  # type: ignore
 
 from xml.sax.saxutils import escape
-from xlsxcessive import markup
-from xlsxcessive.cache import CacheDecorator
+from xlsxcessive import markup, memory
+from xlsxcessive.package import PartCache
+from xlsxcessive.render import CHUNK_SIZE, Renderable, Utf8Writer
+from xlsxcessive.dates import DateSerializer, is_datetime64_with_time
+from xlsxcessive.reference import (
+    a1_to_coords,
+    column_name,
+    coords_to_a1,
+    coords_to_range,
+    range_to_coords,
+)
+from xlsxcessive.stats import active as active_stats
 
 
 class UnsupportedDateBase(Exception):
     pass
 
 
-@CacheDecorator()
-def _coords_to_a1_helper(coords):
-    # the following closure was adapted from
-    # http://stackoverflow.com/questions/22708/how-do-i-find-the-excel-column-name-that-corresponds-to-a-given-integer
-    def num_to_a(n):
-        n -= 1
-        if n >= 0 and n < 26:
-            return chr(65 + n)
-        else:
-            return num_to_a(n // 26) + num_to_a(n % 26 + 1)
+_default_dates = DateSerializer()
+
 
-    a1_col = num_to_a(coords[1] + 1)
-    return "%s%d" % (a1_col, coords[0] + 1)
+def _ensure_ordered(items, ordered, key):
+    """Sort the list items by key unless they are in order already.
 
+    ordered is the number of leading items known to be in order; only the
+    items after those are checked. Returns the new number of ordered items
+    (all of them), to pass in next time.
+    """
+    if ordered > len(items):
+        ordered = 0
+    if ordered < len(items):
+        last = key(items[ordered - 1]) if ordered else None
+        for item in itertools.islice(items, ordered, None):
+            current = key(item)
+            if last is not None and current < last:
+                items.sort(key=key)
+                break
+            last = current
+    return len(items)
 
-class Formula:
+
+_row_key = operator.attrgetter('number')
+_cell_key = operator.attrgetter('column')
+
+
+class Formula(Renderable):
     def __init__(self, source, initial_value=None, shared=False, master=None):
         self.source = source
         self.initial_value = initial_value
         self.shared = shared
         self.master = master
         self.index = None
-        self.refs = []
-        self._ref_str = ''
+        # The (top, left, bottom, right) coordinates of the cells sharing
+        # this formula
+        self.bounds = None
+        # The formula held by the other cells sharing this one
+        self._dependent = None
+        # Set once shared by the instances of a WorkbookTemplate
+        self._frozen = False
 
     def share(self, cell):
-        self.refs.append(cell.reference)
-        if len(self.refs) == 1:
+        """Extend the range of this shared formula to cell and return the
+        Formula for cell to hold.
+        """
+        return self._share_at(cell.coords)
+
+    def _share_at(self, coords):
+        if self.master is not None:
+            self.master._extend(coords)
+            return self
+        self._extend(coords)
+        if self._dependent is None:
             # This is the first cell that this formula is being applied to.
             # Return it directly.
+            self._dependent = Formula(None, shared=True, master=self)
             return self
 
-        # A new cell is referring to this formula. Return a shared version that
-        # points to this one as the master formula.
-        return Formula(None, shared=True, master=self)
+        # A new cell is referring to this formula. Return the shared version
+        # that points to this one as the master formula.
+        return self._dependent
+
+    def _extend(self, coords):
+        if self._frozen:
+            raise ValueError("The shared formulas of a template can't be extended")
+        if coords is None:
+            return
+        row, col = coords
+        bounds = self.bounds
+        if bounds is None:
+            self.bounds = (row, col, row, col)
+        elif not (bounds[0] <= row <= bounds[2] and bounds[1] <= col <= bounds[3]):
+            top, left, bottom, right = bounds
+            self.bounds = (
+                min(top, row),
+                min(left, col),
+                max(bottom, row),
+                max(right, col),
+            )
+
+    def _freeze(self):
+        """Refuse to extend this formula, so that it can be shared."""
+        self._frozen = True
 
     @property
     def _refs(self):
-        if self.shared and not self.master and not self._ref_str:
-            # sort alphabetically and then by length to ensure correct ordering
-            sc = sorted(self.refs)
-            sc = sorted(self.refs, key=len)
-            low, high = sc[0], sc[-1]
-            self._ref_str = "%s:%s" % (low, high)
-        return self._ref_str
+        if self.shared and not self.master and self.bounds:
+            # the range spanning all the cells sharing this formula
+            top, left, bottom, right = self.bounds
+            return coords_to_range((top, left), (bottom, right))
+        return ''
 
     def __str__(self):
         if self.master is not None:
@@ -81,8 +147,11 @@ class Formula:
         ival = '<v>%s</v>' % self.initial_value if self.initial_value else ''
         return '<f %s>%s</f>%s' % (sattrs, self.source, ival)
 
+    def _write_xml(self, out):
+        out.write(str(self))
+
 
-class Worksheet:
+class Worksheet(Renderable):
     """An OOXML Worksheet."""
 
     def __init__(self, workbook, name, sheet_id, relation_id):
@@ -115,6 +184,26 @@ class Worksheet:
         self.formulas = []
         # For settings that apply to entire columns
         self.cols = []
+        # The highest row number used so far
+        self.max_row = 0
+        # Formats referenced by the CellStores of the rows, by style id
+        self._formats = []
+        self._format_ids = {}
+        # The style attributes of CellStore cells (see _style_attrs)
+        self._style_attrs_cache = None
+        # The number of leading rows known to be in order
+        self._rows_ordered = 0
+        # The Workbook keeping track of memory use, if it has a max_memory
+        self._budget = None
+        # Running estimates of the bytes held by the cells and the formulas
+        # of this sheet, kept as they are added (see memory_usage)
+        self._cells_estimate = 0
+        self._formulas_estimate = 0
+        # The content saved last time, reused until this sheet changes
+        self._part_cache = PartCache()
+        # Rendered rows shared with a WorkbookTemplate, as _row_record
+        # records in row order
+        self._base_records = ()
 
     def row(self, number):
         """Returns a Row. If the row doesn't exist, it is created."""
@@ -123,8 +212,29 @@ class Worksheet:
         row = Row(self, number)
         self.rows.append(row)
         self.row_map[number] = row
+        self.max_row = max(self.max_row, number)
+        self._part_cache.dirty = True
+        if self._budget is not None:
+            self._budget._grow(_ROW_BYTES)
         return row
 
+    def append_rows(self, rows, formats=None):
+        """Append rows of values below the last row of this Worksheet.
+
+        rows is an iterable of sequences of cell values, each starting at
+        column A. formats is an optional sequence holding a Format (or
+        None) for each column. None values leave their cell empty.
+
+        This is a fast path for tabular data: numbers and strings are
+        stored as they are and serialized directly, without creating a
+        Cell for each value. Cells are created on demand if a row's cells
+        are accessed later.
+        """
+        number = self.max_row
+        for values in rows:
+            number += 1
+            self.row(number)._pack(values, formats)
+
     def cell(self, *args, **params):
         """Creates and returns a new Cell for this Worksheet.
 
@@ -145,8 +255,31 @@ class Worksheet:
         f = Formula(*args, **params)
         f.index = len(self.formulas)
         self.formulas.append(f)
+        nbytes = _formula_bytes(f)
+        self._formulas_estimate += nbytes
+        if self._budget is not None:
+            self._budget._grow(nbytes)
         return f
 
+    def fill_formula(self, source, cell_range, initial_value=None, format=None):
+        """Fill the cells of cell_range with a shared formula.
+
+        source is the formula of the top left cell of the range (say
+        fill_formula('A2*2', 'D2:D1000')); the other cells share it. The
+        cells get the optional format. Returns the Formula.
+        """
+        (row0, col0), (row1, col1) = range_to_coords(cell_range)
+        top, bottom = min(row0, row1), max(row0, row1)
+        left, right = min(col0, col1), max(col0, col1)
+        formula = self.formula(source, initial_value, shared=True)
+        formula._extend((top, left))
+        formula._extend((bottom, right))
+        values = [formula] * (right - left + 1)
+        formats = [format] * len(values) if format is not None else None
+        for number in range(top + 1, bottom + 2):
+            self.row(number)._pack(values, formats, left)
+        return formula
+
     def col(self, *args, **params):
         """Creates and returns a new Column object for this Worksheet.
 
@@ -154,50 +287,573 @@ class Worksheet:
         """
         c = Column(self, *args, **params)
         self.cols.append(c)
+        self._part_cache.dirty = True
         return c
 
-    def __str__(self):
+    def mark_dirty(self):
+        """Have the next save render this Worksheet again.
+
+        Changes made through Worksheet, Row and Cell methods mark the
+        worksheet already; this is for changes made otherwise, such as
+        setting the width of a Column.
+        """
+        self._part_cache.dirty = True
+        # Format indexes may have changed.
+        self._style_attrs_cache = None
+
+    def write(self, stream):
+        """Write the worksheet XML as UTF-8 to the binary file-like stream.
+
+        The XML is rendered and written incrementally, a batch of rows at
+        a time, so the complete document never exists in memory.
+        """
+        stats = active_stats()
+        with stats.phase('worksheet'):
+            written = self.render_to(stream)
+        stats.sheet(self.name, bytes=written)
+
+    def _write_xml(self, out):
+        if self._base_records:
+            bounds = _bounds(_record_spans(self._base_records))
+            self._write_merged(out, [self._base_records], bounds)
+        else:
+            self._write_in_memory(out)
+
+    def _write_in_memory(self, out):
         merges = []
-        rows = []
-        # Sort to put the rows and cells in the correct order - it
-        # seems like this matters to Excel (though Open Office doesn't
-        # care).
-        self.rows.sort(key=operator.attrgetter('number'))
+        with active_stats().phase('sort'):
+            # Put the rows and cells in the correct order - it seems like
+            # this matters to Excel (though Open Office doesn't care).
+            self._rows_ordered = _ensure_ordered(
+                self.rows, self._rows_ordered, _row_key
+            )
+            # Finding the used range orders the cells of each row.
+            bounds = _bounds(_row_spans(self.rows))
+        out.write(self._head_xml(bounds))
         for row in self.rows:
-            # First sort the keys alphanumerically
-            row.cells.sort(key=operator.attrgetter('reference'))
-            # Then by length to get the correct sort order for A1 notation
-            # where AA1 > Z1.
-            row.cells.sort(key=lambda c: len(c.reference))
-            rows.append(str(row))
+            row._write_xml(out)
             merges.extend(row.merge_cells)
-        rows = ''.join(rows)
-        if self.cols:
-            cols_ = ''.join(str(col) for col in self.cols)
-            cols = '<cols>%s</cols>' % cols_
+        out.write(
+            markup.worksheet_tail % {'merge_cells': self._merge_cells_xml(merges)}
+        )
+
+    def _write_merged(self, out, sources, bounds):
+        """Write the rows in memory merged with rendered rows.
+
+        sources are iterables of (number, column indexes, cells, merges)
+        records in row order, such as those of _row_record. Records of the
+        same row are combined, the cells of earlier sources first. bounds
+        are those of the cells of sources (see _bounds).
+        """
+        with active_stats().phase('sort'):
+            bounds = _bounds(_row_spans(self.rows), bounds)
+        out.write(self._head_xml(bounds))
+        merges = []
+        for number, cols, cells, row_merges in self._merged_records(sources):
+            out.write(_row_start(number, (cols[0], cols[-1]) if cols else None))
+            out.writelines(cells)
+            out.write('</row>')
+            merges.extend(row_merges)
+        out.write(
+            markup.worksheet_tail % {'merge_cells': self._merge_cells_xml(merges)}
+        )
+
+    def _merged_records(self, sources):
+        """Generate the records of the rows in memory merged with sources."""
+        with active_stats().phase('sort'):
+            self._rows_ordered = _ensure_ordered(
+                self.rows, self._rows_ordered, _row_key
+            )
+        records = heapq.merge(*sources, map(_row_record, self.rows), key=_record_key)
+        for number, group in itertools.groupby(records, _record_key):
+            record = next(group)
+            rest = list(group)
+            if not rest:
+                yield record
+                continue
+            # heapq.merge is stable, so earlier sources come first.
+            group = [record, *rest]
+            columns = [zip(cols, cells) for _, cols, cells, _ in group]
+            cols, cells = zip(*heapq.merge(*columns, key=_record_key))
+            merges = [merge for record in group for merge in record[3]]
+            yield number, cols, cells, merges
+
+    def _records(self):
+        """Return the rendered rows of this Worksheet, as _row_record
+        records in row order.
+        """
+        return tuple(self._merged_records([self._base_records]))
+
+    def write_array(self, array, origin="A1", formats=None):
+        """Write the numbers of a 2-D numpy array into this Worksheet.
+
+        The top left value goes into the cell referenced by origin. formats
+        is an optional sequence holding a Format (or None) for each column
+        of the array. NaN and infinite values leave their cell empty.
+
+        Integer, floating point and datetime64 arrays are supported.
+        Masking and the conversion to Python numbers (or date serial
+        values) happen a whole block at a time; the rows are then stored
+        and rendered like those of append_rows, so the values render
+        exactly as they would in individual Cells. NaT values leave their
+        cell empty and datetime64 columns without a format get the default
+        date or datetime format. Requires numpy.
+        """
+        import numpy
+
+        array = numpy.asarray(array)
+        if array.ndim != 2:
+            raise ValueError("Expected a 2-D array, got %d dimensions" % array.ndim)
+        kind = array.dtype.kind
+        if kind == 'f':
+            code = _FLOAT
+            if array.dtype == numpy.float64:
+                numbers = array.astype(numpy.float64)
+            else:
+                # Go through the shortest repr, as a Cell would: widening
+                # float32 0.1 gives 0.10000000149011612.
+                numbers = array.astype(str).astype(numpy.float64)
+            numbers[~numpy.isfinite(array)] = numpy.nan
+        elif kind in 'iu':
+            if array.size and (
+                array.min() <= -_MAX_EXACT_INT or array.max() >= _MAX_EXACT_INT
+            ):
+                # Too large for the float store; keep them as Python ints.
+                self._write_rows(array.tolist(), origin, formats)
+                return
+            code = _INT
+            numbers = array.astype(numpy.float64)
+        elif kind == 'M':
+            code = _DATETIME if is_datetime64_with_time(array) else _DATE
+            numbers = self._date_serializer().datetime64(array).astype(numpy.float64)
+            numbers[numpy.isnat(array)] = numpy.nan
+            formats = self._date_formats(array, formats)
         else:
-            cols = ''
-        merge_elems = [f'<mergeCell ref="{merge_range}" />' for merge_range in merges]
-        merge_cells = bool(merges) * f'<mergeCells>{"".join(merge_elems)}</mergeCells>'
+            raise ValueError("Unsupported array dtype: %s" % array.dtype)
+        row0, col0 = Cell(origin).coords
+        for offset, row_numbers in enumerate(numbers):
+            self.row(row0 + offset + 1)._pack_array(col0, row_numbers, code, formats)
+
+    def _write_rows(self, rows, origin, formats):
+        row0, col0 = Cell(origin).coords
+        for offset, values in enumerate(rows):
+            self.row(row0 + offset + 1)._pack(values, formats, col0)
+
+    def _style_id(self, fmt):
+        """Return the id of fmt in the formats used by CellStores.
 
-        return markup.worksheet % {
-            'rows': rows,
-            'cols': cols,
-            'merge_cells': merge_cells,
+        Style ids start at 1; 0 means no format.
+        """
+        if fmt is None:
+            return 0
+        try:
+            return self._format_ids[fmt]
+        except KeyError:
+            pass
+        self._formats.append(fmt)
+        style = self._format_ids[fmt] = len(self._formats)
+        if self._style_attrs_cache is not None:
+            self._style_attrs_cache[0].append(' s="%d"' % fmt.index)
+        return style
+
+    def _style_attrs(self):
+        """Return the style attributes of CellStore cells by style id and
+        by type code.
+
+        The latter hold the default styles of dates, datetimes and times.
+        Both are kept until a format changes.
+        """
+        if self._style_attrs_cache is None:
+            by_code = [''] * (_CELL + 1)
+            if not self.workbook:
+                return [], by_code
+            by_style = [''] + [' s="%d"' % fmt.index for fmt in self._formats]
+            stylesheet = self.workbook.stylesheet
+            by_code[_DATE] = ' s="%d"' % stylesheet.default_date_format.index
+            by_code[_DATETIME] = ' s="%d"' % stylesheet.default_datetime_format.index
+            by_code[_TIME] = ' s="%d"' % stylesheet.default_time_format.index
+            self._style_attrs_cache = by_style, by_code
+        return self._style_attrs_cache
+
+    def _date_serializer(self):
+        if self.workbook:
+            return self.workbook.date_serializer
+        return _default_dates
+
+    def _date_formats(self, array, formats):
+        """Fill in default formats for the columns of a datetime64 array."""
+        if not self.workbook:
+            return formats
+        stylesheet = self.workbook.stylesheet
+        if is_datetime64_with_time(array):
+            default = stylesheet.default_datetime_format
+        else:
+            default = stylesheet.default_date_format
+        formats = list(formats or ())
+        formats += [None] * (array.shape[1] - len(formats))
+        return [fmt or default for fmt in formats]
+
+    def _head_xml(self, bounds):
+        return markup.worksheet_head % {
+            'dimension': _dimension_xml(bounds),
+            'cols': self._cols_xml(),
         }
 
+    def _cols_xml(self):
+        if not self.cols:
+            return ''
+        cols_ = ''.join(str(col) for col in self.cols)
+        return '<cols>%s</cols>' % cols_
+
+    @staticmethod
+    def _merge_cells_xml(merges):
+        merge_elems = [f'<mergeCell ref="{merge_range}" />' for merge_range in merges]
+        return bool(merges) * f'<mergeCells>{"".join(merge_elems)}</mergeCells>'
+
+    def memory_usage(self, deep=False):
+        """Estimate the bytes held by this Worksheet.
+
+        Returns a MemoryUsage (see xlsxcessive.memory) splitting the
+        estimate into rows, cells and formulas. The estimate is kept up to
+        date as rows, cells and formulas are added; if deep is True, all
+        the rows and cells are measured instead, which is much slower.
+        """
+        if not deep:
+            return memory.usage(
+                rows=len(self.rows) * _ROW_BYTES,
+                cells=self._cells_estimate,
+                formulas=self._formulas_estimate,
+            )
+        rows = sys.getsizeof(self.rows) + sys.getsizeof(self.row_map)
+        cells = 0
+        for row in self.rows:
+            rows += row._overhead_bytes()
+            cells += row._cell_bytes()
+        formulas = sys.getsizeof(self.formulas) + sum(
+            map(_formula_bytes, self.formulas)
+        )
+        return memory.usage(rows=rows, cells=cells, formulas=formulas)
+
+    def _release(self, rows):
+        """Stop counting the bytes held by rows, written out of memory."""
+        released = sum(row._charged for row in rows)
+        self._cells_estimate -= released
+        if self._budget is not None:
+            self._budget._grow(-(released + len(rows) * _ROW_BYTES))
+
+    def _cell_counts(self):
+        """Count the cells of this Worksheet by kind of value."""
+        return _count_cells(self.rows)
+
+    def _row_count(self):
+        """The number of rows of this Worksheet."""
+        return len(self.rows)
+
+
+class StreamingWorksheet(Worksheet):
+    """A write-only OOXML Worksheet with a flat memory profile.
+
+    Rows must be created in ascending order. Asking for a row with a
+    higher number than any row seen so far finishes the rows held in
+    memory: they are serialized to a temporary spool file and dropped,
+    so memory use does not grow with the number of rows. Finished rows
+    can't be changed or revisited.
+
+    Columns, formats and merges work as they do on a regular Worksheet.
+    Columns may be added at any time before saving.
+    """
+
+    def __init__(self, workbook, name, sheet_id, relation_id):
+        super().__init__(workbook, name, sheet_id, relation_id)
+        self.merges = []
+        self._spool = tempfile.TemporaryFile()
+        # Discards the spool once the sheet is closed or collected.
+        self._close_spool = weakref.finalize(self, self._spool.close)
+        # The bounds of the spooled cells (see _bounds)
+        self._spooled_bounds = None
+        # The number of spooled rows and the counts of their cells (see
+        # _tally_cells)
+        self._spooled_rows = 0
+        self._spooled_codes = collections.Counter()
+        self._spooled_cells = collections.Counter()
+
+    def row(self, number):
+        """Returns a Row. If the row doesn't exist, it is created.
+
+        Creating a row flushes all rows before it.
+        """
+        if number in self.row_map:
+            return self.row_map[number]
+        if number <= self.max_row:
+            raise ValueError("Row %d has already been written." % number)
+        self.flush()
+        return super().row(number)
+
+    def flush(self):
+        """Serialize the rows held in memory to the spool."""
+        self._release(self.rows)
+        self._spooled_bounds = _bounds(_row_spans(self.rows), self._spooled_bounds)
+        self._spooled_rows += len(self.rows)
+        _tally_cells(self.rows, self._spooled_codes, self._spooled_cells)
+        out = Utf8Writer(self._spool)
+        for row in self.rows:
+            row._write_xml(out)
+            self.merges.extend(row.merge_cells)
+        out.flush()
+        self.rows.clear()
+        self.row_map.clear()
+
+    def _write_xml(self, out):
+        self.flush()
+        out.write(self._head_xml(self._spooled_bounds))
+        self._spool.seek(0)
+        for data in iter(functools.partial(self._spool.read, CHUNK_SIZE), b''):
+            out.write_bytes(data)
+        out.write(
+            markup.worksheet_tail % {'merge_cells': self._merge_cells_xml(self.merges)}
+        )
+
+    def _cell_counts(self):
+        codes = self._spooled_codes.copy()
+        kinds = self._spooled_cells.copy()
+        _tally_cells(self.rows, codes, kinds)
+        return _cell_kinds(codes, kinds)
+
+    def _row_count(self):
+        return self._spooled_rows + len(self.rows)
+
+    def close(self):
+        """Discard the spooled rows."""
+        self._close_spool()
+
+
+class SpillingWorksheet(Worksheet):
+    """An OOXML Worksheet holding a bounded number of rows in memory.
+
+    Rows can be created and revisited in any order, as on a regular
+    Worksheet. Once spill_rows rows are held in memory, creating another
+    one spills them: they are rendered, sorted and written to a temporary
+    run file, and dropped. Saving merges the runs and the rows left in
+    memory in row order. Asking for a row that was spilled returns a new
+    Row; its cells are merged with the spilled ones by column.
+
+    Spilled rows are rendered as they are at the time, so later changes to
+    their formats aren't reflected. Rows holding the first cell of a
+    shared formula stay in memory, since the range of the formula is only
+    known once all its cells are added. Row objects obtained before a
+    spill must not be changed after it; ask the worksheet for them again.
+    """
+
+    def __init__(self, workbook, name, sheet_id, relation_id, spill_rows):
+        if spill_rows < 1:
+            raise ValueError("spill_rows must be positive, got %r" % spill_rows)
+        super().__init__(workbook, name, sheet_id, relation_id)
+        self.spill_rows = spill_rows
+        # Temporary files holding the spilled rows, each sorted by number
+        self._runs = []
+        # Discards the runs once the sheet is closed or collected.
+        self._close_runs = weakref.finalize(self, _close_all, self._runs)
+        # The bounds of the spilled cells (see _bounds)
+        self._spilled_bounds = None
+        # The number of spilled rows and the counts of their cells (see
+        # _tally_cells). Rows revisited after being spilled count once per
+        # run holding them.
+        self._spilled_rows = 0
+        self._spilled_codes = collections.Counter()
+        self._spilled_cells = collections.Counter()
+
+    def row(self, number):
+        """Returns a Row. If the row doesn't exist, it is created.
+
+        Creating a row spills the rows held in memory if there are
+        spill_rows of them.
+        """
+        if number not in self.row_map and len(self.rows) >= self.spill_rows:
+            self.spill()
+        return super().row(number)
+
+    def spill(self):
+        """Write the rows held in memory to a new run file."""
+        spilled, kept = [], []
+        for row in self.rows:
+            (kept if _has_shared_formula(row) else spilled).append(row)
+        if not spilled:
+            return
+        spilled.sort(key=_row_key)
+        self._spilled_bounds = _bounds(_row_spans(spilled), self._spilled_bounds)
+        self._spilled_rows += len(spilled)
+        _tally_cells(spilled, self._spilled_codes, self._spilled_cells)
+        run = tempfile.TemporaryFile()
+        pickler = pickle.Pickler(run, pickle.HIGHEST_PROTOCOL)
+        for row in spilled:
+            pickler.dump(_row_record(row))
+            pickler.clear_memo()
+        # Nothing must be left to write once forked save workers share it.
+        run.flush()
+        self._runs.append(run)
+        self.rows[:] = kept
+        self.row_map = {row.number: row for row in kept}
+        self._rows_ordered = 0
+        self._release(spilled)
+
+    def _write_xml(self, out):
+        runs = map(_read_run, self._runs)
+        bounds = _bounds(_record_spans(self._base_records), self._spilled_bounds)
+        self._write_merged(out, [self._base_records, *runs], bounds)
+
+    def _cell_counts(self):
+        codes = self._spilled_codes.copy()
+        kinds = self._spilled_cells.copy()
+        _tally_cells(self.rows, codes, kinds)
+        return _cell_kinds(codes, kinds)
+
+    def _row_count(self):
+        return self._spilled_rows + len(self.rows)
+
+    def close(self):
+        """Discard the spilled rows."""
+        self._close_runs()
+
+
+def _close_all(files):
+    for file in files:
+        file.close()
+
+
+def _has_shared_formula(row):
+    """Whether row holds the first cell of a shared formula."""
+    values = (cell._value for cell in row._cells)
+    if row._store is not None:
+        values = (
+            obj._value if isinstance(obj, Cell) else obj for obj in row._store.objects
+        )
+    for value in values:
+        if isinstance(value, Formula) and value.shared and value.master is None:
+            return True
+    return False
+
+
+def _row_spans(rows):
+    """Generate the (row index, first column, last column) spans of the
+    cells of rows, skipping empty rows.
+    """
+    for row in rows:
+        span = row._span()
+        if span is not None:
+            yield row.number - 1, span[0], span[1]
+
+
+def _record_spans(records):
+    """Generate the spans of the cells of _row_record records."""
+    for number, cols, _, _ in records:
+        if cols:
+            yield number - 1, cols[0], cols[-1]
+
+
+def _bounds(spans, bounds=None):
+    """Return bounds grown to hold the cells of spans.
+
+    Bounds are (top, left, bottom, right) 0-based indexes, or None when
+    there are no cells.
+    """
+    spans = iter(spans)
+    if bounds is None:
+        for index, first, last in spans:
+            bounds = index, first, index, last
+            break
+        else:
+            return None
+    top, left, bottom, right = bounds
+    for index, first, last in spans:
+        if index < top:
+            top = index
+        elif index > bottom:
+            bottom = index
+        if first < left:
+            left = first
+        if last > right:
+            right = last
+    return top, left, bottom, right
+
+
+def _dimension_xml(bounds):
+    if bounds is None:
+        return '<dimension ref="A1"/>'
+    top, left, bottom, right = bounds
+    if (top, left) == (bottom, right):
+        return '<dimension ref="%s"/>' % coords_to_a1((top, left))
+    return '<dimension ref="%s"/>' % coords_to_range((top, left), (bottom, right))
+
+
+def _row_start(number, span):
+    """Return the start tag of row number, with the span of its cells."""
+    if span is None:
+        return '<row r="%s">' % number
+    return '<row r="%s" spans="%d:%d">' % (number, span[0] + 1, span[1] + 1)
+
+
+def _row_record(row):
+    """Render row into a (number, column indexes, cells, merges) record."""
+    # Rendering puts the cells in order first.
+    cells = row._render_cells()
+    return row.number, row._columns(), cells, row.merge_cells
+
+
+def _read_run(run):
+    """Generate the records of a run file."""
+    run.seek(0)
+    while True:
+        try:
+            # A new unpickler each time, as the memo of one keeps growing.
+            yield pickle.load(run)
+        except EOFError:
+            return
+
+
+_record_key = operator.itemgetter(0)
+
+
+class Row(Renderable):
+    __slots__ = (
+        'sheet',
+        'number',
+        '_cells',
+        '_cell_map',
+        '_ordered',
+        '_store',
+        '_charged',
+        'merge_cells',
+    )
 
-class Row:
     def __init__(self, sheet, number):
         self.sheet = sheet
         self.number = number
-        self.cells = []
-        self.cell_map = {}
+        self._cells = []
+        self._cell_map = {}
+        # The number of leading cells known to be in column order
+        self._ordered = 0
+        # Compact storage for cells added in bulk (see CellStore)
+        self._store = None
+        # The bytes charged to the memory estimate of the sheet (see _charge)
+        self._charged = 0
 
         # populated during rendering with references of merge cells
         self.merge_cells = []
 
+    @property
+    def cells(self):
+        if self._store is not None:
+            self._unpack()
+        return self._cells
+
+    @property
+    def cell_map(self):
+        if self._store is not None:
+            self._unpack()
+        return self._cell_map
+
     def cell(self, *args, **params):
+        params.setdefault('worksheet', self.sheet)
         cell = Cell(*args, **params)
         if cell.reference in self.cell_map:
             return self.cell_map[cell.reference]
@@ -208,15 +864,415 @@ class Row:
     def add_cell(self, cell):
         self.cells.append(cell)
         self.cell_map[cell.reference] = cell
+        sheet = self.sheet
+        if sheet is not None:
+            if cell.worksheet is None:
+                cell.worksheet = sheet
+            sheet._part_cache.dirty = True
+            self._charge(_CELL_BYTES + _value_bytes(cell._value))
+
+    def _overhead_bytes(self):
+        """The bytes held by this Row, not counting its cells."""
+        size = sum(
+            map(sys.getsizeof, (self, self._cells, self._cell_map, self.merge_cells))
+        )
+        if self._store is not None:
+            size += sys.getsizeof(self._store)
+        return size
+
+    def _cell_bytes(self):
+        """The bytes held by the cells of this Row."""
+        size = sum(map(_cell_bytes, self._cells))
+        store = self._store
+        if store is not None:
+            size += memory.sizeof_all((
+                store.cols,
+                store.types,
+                store.styles,
+                store.numbers,
+                store.objects,
+            ))
+            for code, value in zip(store.types, store.numbers):
+                if code >= _NUMBER:
+                    obj = store.objects[int(value)]
+                    size += _object_bytes(obj)
+        return size
+
+    def _pack(self, values, formats, col0=0):
+        """Store values compactly, the first at column index col0.
+
+        Numbers, strings, dates and formulas go into the CellStore of the
+        row; other values are converted to Cells right away.
+        """
+        store = self._writable_store(col0)
+        if store is None:
+            self._add_cells(values, formats, col0)
+            return
+        style_ids = self._style_ids(formats)
+        shared_strings = self._shared_strings()
+        stored, objects = len(store.cols), len(store.objects)
+        for offset, value in enumerate(values):
+            if value is None:
+                continue
+            col = col0 + offset
+            style = style_ids[offset] if offset < len(style_ids) else 0
+            kind = type(value)
+            if kind is float:
+                store.append(col, _FLOAT, style, value)
+            elif kind is int and -_MAX_EXACT_INT < value < _MAX_EXACT_INT:
+                store.append(col, _INT, style, value)
+            elif kind is str:
+                if shared_strings is not None:
+                    shared_strings.add(escape(value))
+                store.append_object(col, _STRING, style, value)
+            else:
+                fmt = _column_format(formats, offset)
+                self._pack_object(store, col, style, value, fmt)
+        if self.sheet is not None:
+            self.sheet._part_cache.dirty = True
+            nbytes = (len(store.cols) - stored) * _PACKED_BYTES
+            nbytes += sum(map(_object_bytes, store.objects[objects:]))
+            self._charge(nbytes, store)
+
+    def _pack_object(self, store, col, style, value, fmt):
+        """Store a value other than a float, small int or str (see _pack).
+
+        Values that can't be stored as they are become Cells with format
+        fmt.
+        """
+        kind = type(value)
+        if kind in _DATE_CODES:
+            serial = self._date_serializer().converter(kind)(value)
+            store.append(col, _DATE_CODES[kind], style, serial)
+        elif kind in _PACKED_NUMBER_TYPES:
+            store.append_object(col, _NUMBER, style, value)
+        elif kind is Formula:
+            if value.shared:
+                value = value._share_at((self.number - 1, col))
+            store.append_object(col, _FORMULA, style, value)
+        else:
+            cell = self._new_cell(col, value, fmt)
+            store.append_object(col, _CELL, 0, cell)
 
-    def __str__(self):
+    def _pack_array(self, col0, numbers, code, formats):
+        """Store a row of a numpy float64 array, NaN marking empty cells.
+
+        code is the type code of the values.
+        """
+        import numpy
+
+        store = self._writable_store(col0)
+        if store is None:
+            convert = int if code == _INT or code == _DATE else float
+            values = [None if num != num else convert(num) for num in numbers.tolist()]
+            self._add_cells(values, formats, col0)
+            return
+        present = ~numpy.isnan(numbers)
+        offsets = numpy.flatnonzero(present)
+        style_ids = self._style_ids(formats)
+        style_ids += [0] * (len(numbers) - len(style_ids))
+        store.extend(
+            (offsets + col0).tolist(),
+            code,
+            numpy.take(style_ids, offsets).tolist(),
+            numbers[present].tobytes(),
+        )
+        if self.sheet is not None:
+            self.sheet._part_cache.dirty = True
+            self._charge(len(offsets) * _PACKED_BYTES, store)
+
+    def _writable_store(self, col0):
+        """Return the CellStore to append cells from column col0 to.
+
+        Returns None if cells can't be added to a CellStore in column order.
+        """
+        if self._store is None:
+            if self._cells:
+                return None
+            self._store = _CellStore()
+            if self.sheet is not None:
+                self._charge(_STORE_BYTES, self._store)
+        elif self._store.cols and self._store.cols[-1] >= col0:
+            self._unpack()
+            return None
+        return self._store
+
+    def _charge(self, nbytes, store=None):
+        """Add nbytes held by the cells of this Row, or by its CellStore if
+        store is given, to the memory estimate of the sheet, and to its
+        memory budget if it has one.
+
+        The charged bytes are kept track of, so that exactly those are
+        released once the row or its CellStore is dropped.
+        """
+        sheet = self.sheet
+        if sheet is not None:
+            self._charged += nbytes
+            if store is not None:
+                store.charged += nbytes
+            sheet._cells_estimate += nbytes
+            if sheet._budget is not None:
+                sheet._budget._grow(nbytes)
+
+    def _add_cells(self, values, formats, col0):
+        for offset, value in enumerate(values):
+            if value is not None:
+                fmt = _column_format(formats, offset)
+                self.add_cell(self._new_cell(col0 + offset, value, fmt))
+
+    def _new_cell(self, col, value, fmt):
+        return Cell(
+            coords=(self.number - 1, col), value=value, format=fmt, worksheet=self.sheet
+        )
+
+    def _style_ids(self, formats):
+        if not formats or not self.sheet:
+            return []
+        return [self.sheet._style_id(fmt) for fmt in formats]
+
+    def _unpack(self):
+        """Replace the CellStore by Cells."""
+        store, self._store = self._store, None
+        self._charge(-store.charged)
+        formats = self.sheet._formats if self.sheet else []
+        for col, code, style, value in store:
+            if code == _CELL:
+                self.add_cell(value)
+                continue
+            fmt = formats[style - 1] if style else None
+            if code == _FORMULA:
+                # Shared already; assigning it would share it again.
+                cell = self._new_cell(col, None, fmt)
+                cell.cell_type = 'str'
+                cell._value = value
+                self.add_cell(cell)
+                continue
+            cell = self._new_cell(col, value, fmt)
+            cell._is_date = code == _DATE
+            cell._is_datetime = code == _DATETIME
+            cell._is_time = code == _TIME
+            self.add_cell(cell)
+
+    def _shared_strings(self):
+        if self.sheet and self.sheet.workbook:
+            return self.sheet.workbook.shared_strings
+
+    def _date_serializer(self):
+        if self.sheet and self.sheet.workbook:
+            return self.sheet.workbook.date_serializer
+        return _default_dates
+
+    def _render_store(self):
+        """Render the CellStore the way the equivalent Cells would.
+
+        Returns a list holding the XML of each cell, in column order.
+        """
+        number = self.number
+        store = self._store
+        objects = store.objects
+        if self.sheet is not None:
+            by_style, by_code = self.sheet._style_attrs()
+        else:
+            by_style, by_code = [], [''] * (_CELL + 1)
+        shared_strings = self._shared_strings()
+        cells = []
+        for col, code, style, num in zip(
+            store.cols, store.types, store.styles, store.numbers
+        ):
+            if code == _CELL:
+                cell = objects[int(num)]
+                cells.append(str(cell))
+                if cell.merge_range:
+                    self.merge_cells.append(cell.merge_range)
+                continue
+            ref = '%s%d' % (column_name(col), number)
+            style_attr = by_style[style] if style else by_code[code]
+            if code == _FLOAT or code == _DATETIME or code == _TIME:
+                cells.append('<c r="%s" t="n"%s><v>%r</v></c>' % (ref, style_attr, num))
+            elif code == _INT or code == _DATE:
+                cells.append('<c r="%s" t="n"%s><v>%d</v></c>' % (ref, style_attr, num))
+            elif code == _NUMBER:
+                value = objects[int(num)]
+                cells.append(
+                    '<c r="%s" t="n"%s><v>%s</v></c>' % (ref, style_attr, value)
+                )
+            elif code == _FORMULA:
+                formula = objects[int(num)]
+                cells.append('<c r="%s" t="str"%s>%s</c>' % (ref, style_attr, formula))
+            elif shared_strings is None:
+                text = escape(objects[int(num)])
+                cells.append(
+                    '<c r="%s" t="inlineStr"%s><is><t>%s</t></is></c>'
+                    % (ref, style_attr, text)
+                )
+            else:
+                idx = shared_strings.index[escape(objects[int(num)])]
+                cells.append('<c r="%s" t="s"%s><v>%d</v></c>' % (ref, style_attr, idx))
+        return cells
+
+    def _render_cells(self):
+        """Return a list holding the XML of each cell of this Row."""
+        self.merge_cells = []
+        if self._store is not None:
+            # Packed values are in column order already.
+            return self._render_store()
+        self._ordered = _ensure_ordered(self._cells, self._ordered, _cell_key)
         cells = []
         for c in self.cells:
             cells.append(str(c))
             if c.merge_range:
                 self.merge_cells.append(c.merge_range)
-        cells = ''.join(cells)
-        return '<row r="%s">%s</row>' % (self.number, cells)
+        return cells
+
+    def _columns(self):
+        """Return the column index of each cell of this Row."""
+        if self._store is not None:
+            return self._store.cols.tolist()
+        return [c.column for c in self._cells]
+
+    def _span(self):
+        """Return the first and last column indexes of the cells of this
+        Row, or None if it has none.
+        """
+        if self._store is not None:
+            cols = self._store.cols
+            return (cols[0], cols[-1]) if cols else None
+        if not self._cells:
+            return None
+        self._ordered = _ensure_ordered(self._cells, self._ordered, _cell_key)
+        return self._cells[0].column, self._cells[-1].column
+
+    def _write_xml(self, out):
+        out.write(_row_start(self.number, self._span()))
+        out.writelines(self._render_cells())
+        out.write('</row>')
+
+
+# CellStore type codes
+_FLOAT, _INT, _DATE, _DATETIME, _TIME, _NUMBER, _STRING, _FORMULA, _CELL = range(9)
+
+_DATE_CODES = {
+    datetime.date: _DATE,
+    datetime.datetime: _DATETIME,
+    datetime.time: _TIME,
+}
+
+# The kinds of values counted by _count_cells, by type code
+_STORE_KINDS = {
+    _FLOAT: 'number',
+    _INT: 'number',
+    _NUMBER: 'number',
+    _DATE: 'date',
+    _DATETIME: 'date',
+    _TIME: 'date',
+    _STRING: 'string',
+    _FORMULA: 'formula',
+}
+
+
+def _count_cells(rows):
+    """Count the cells of rows by kind of value."""
+    codes, kinds = collections.Counter(), collections.Counter()
+    _tally_cells(rows, codes, kinds)
+    return _cell_kinds(codes, kinds)
+
+
+def _tally_cells(rows, codes, kinds):
+    """Add the cells of rows to the counts of codes, by type code for the
+    values of CellStores, and of kinds, by kind of value for Cells.
+    """
+    for row in rows:
+        store = row._store
+        if store is None:
+            kinds.update(map(_cell_kind, row._cells))
+            continue
+        codes.update(store.types)
+        if _CELL in store.types:
+            cells = (obj for obj in store.objects if isinstance(obj, Cell))
+            kinds.update(map(_cell_kind, cells))
+
+
+def _cell_kinds(codes, kinds):
+    """Combine the counts of _tally_cells by kind of value."""
+    counts = collections.Counter(kinds)
+    for code, count in codes.items():
+        if code != _CELL:
+            counts[_STORE_KINDS[code]] += count
+    return counts
+
+
+def _cell_kind(cell):
+    if cell._is_date or cell._is_datetime or cell._is_time:
+        return 'date'
+    return _CELL_KINDS.get(cell.cell_type, 'empty')
+
+
+_CELL_KINDS = {'n': 'number', 'inlineStr': 'string', 's': 'string', 'str': 'formula'}
+
+# Numbers stored as objects rather than as floats
+_PACKED_NUMBER_TYPES = {int, decimal.Decimal}
+
+# Integers beyond this magnitude can't be stored as floats exactly
+_MAX_EXACT_INT = 2**53
+
+
+class _CellStore:
+    """Compact storage for the cells of a Row.
+
+    Instead of a Cell per value, the column index, a type code, a style id
+    and the value of each cell are kept in parallel arrays, in column
+    order. Numbers and date serial values are stored in a float array;
+    strings and other values are kept in a list, referenced by their
+    position from the float array. Style ids refer to the formats of the
+    Worksheet, 0 meaning no format.
+    """
+
+    __slots__ = 'cols', 'types', 'styles', 'numbers', 'objects', 'charged'
+
+    def __init__(self):
+        self.cols = array.array('I')
+        self.types = array.array('B')
+        self.styles = array.array('I')
+        self.numbers = array.array('d')
+        self.objects = []
+        # The bytes charged to the memory estimate of the sheet for the store
+        self.charged = 0
+
+    def append(self, col, code, style, number):
+        self.cols.append(col)
+        self.types.append(code)
+        self.styles.append(style)
+        self.numbers.append(number)
+
+    def append_object(self, col, code, style, value):
+        self.append(col, code, style, len(self.objects))
+        self.objects.append(value)
+
+    def extend(self, cols, code, styles, numbers):
+        """Append numbers of a single type code; numbers are raw doubles."""
+        self.cols.extend(cols)
+        self.types.extend(bytes([code]) * len(cols))
+        self.styles.extend(styles)
+        self.numbers.frombytes(numbers)
+
+    def __iter__(self):
+        """Generate (col, code, style, value) for each cell."""
+        for col, code, style, num in zip(
+            self.cols, self.types, self.styles, self.numbers
+        ):
+            yield col, code, style, self._value(code, num)
+
+    def _value(self, code, num):
+        if code >= _NUMBER:
+            return self.objects[int(num)]
+        if code == _INT or code == _DATE:
+            return int(num)
+        return num
+
+
+def _column_format(formats, col):
+    if formats is not None and col < len(formats):
+        return formats[col]
 
 
 class Column:
@@ -264,17 +1320,18 @@ class Column:
         return dict(min=self.number, max=self.number)
 
 
-class Cell:
+class Cell(Renderable):
     __slots__ = (
         '_reference',
         '_coords',
+        '_column',
         'cell_type',
         '_value',
         '_is_date',
         '_is_datetime',
         '_is_time',
         'worksheet',
-        'format',
+        '_format',
         'merge_range',
     )
 
@@ -283,15 +1340,17 @@ class Cell:
     ):
         self._reference = reference.upper() if reference else reference
         self._coords = coords
+        self._column = None
         if not self._reference and self._coords:
             self._reference = self._coords_to_a1()
+            self._column = coords[1]
         self.cell_type = None
         self._is_date = False
         self._is_datetime = False
         self._is_time = False
         self.worksheet = worksheet
-        self.value = value
-        self.format = format
+        self._set_value(value)
+        self._format = format
         self.merge_range = None
 
     @classmethod
@@ -304,6 +1363,20 @@ class Cell:
 
     def merge(self, other):
         self.merge_range = "%s:%s" % (self.reference, other.reference)
+        self._changed()
+
+    def _changed(self):
+        if self.worksheet is not None:
+            self.worksheet._part_cache.dirty = True
+
+    @property
+    def format(self):
+        return self._format
+
+    @format.setter
+    def format(self, format):
+        self._format = format
+        self._changed()
 
     @property
     def value(self):
@@ -311,115 +1384,91 @@ class Cell:
 
     @value.setter
     def value(self, value):
-        return self._set_value(value)
+        self._set_value(value)
+        self._changed()
 
-    @singledispatchmethod
     def _set_value(self, value):
+        setter = _VALUE_SETTERS.get(type(value))
+        if setter is None:
+            self._dispatch_value(value)
+        else:
+            setter(self, value)
+
+    # Finds the setter of the values not in _VALUE_SETTERS, by their MRO
+    @singledispatchmethod
+    def _dispatch_value(self, value):
         raise ValueError("Unsupported cell value: %r" % value)
 
-    @_set_value.register(numbers.Number)
+    @_dispatch_value.register(numbers.Number)
     def _set_number(self, value):
         self.cell_type = "n"
         self._value = value
 
-    @_set_value.register(datetime.datetime)
+    @_dispatch_value.register(datetime.datetime)
     def _set_datetime(self, value):
         self._is_datetime = True
-        self.value = self._serialize_datetime(value)
+        self._set_number(self._serialize_datetime(value))
 
-    def _date_base(self):
-        return 1904 if self.worksheet and self.worksheet.workbook.date1904 else 1900
+    def _date_serializer(self):
+        if self.worksheet and self.worksheet.workbook:
+            return self.worksheet.workbook.date_serializer
+        return _default_dates
 
-    @_set_value.register(datetime.date)
+    @_dispatch_value.register(datetime.date)
     def _set_date(self, value):
         self._is_date = True
-        self.value = self._serialize_date(value)
+        self._set_number(self._serialize_date(value))
 
-    @_set_value.register(datetime.time)
+    @_dispatch_value.register(datetime.time)
     def _set_time(self, value):
         self._is_time = True
-        self.value = self._serialize_time(value)
+        self._set_number(self._serialize_time(value))
+
+    def _shared_strings(self):
+        if self.worksheet and self.worksheet.workbook:
+            return self.worksheet.workbook.shared_strings
 
-    @_set_value.register(str)
+    @_dispatch_value.register(str)
     def _set_str(self, value):
-        self.cell_type = "inlineStr"
         self._value = escape(value)
+        shared_strings = self._shared_strings()
+        if shared_strings is None:
+            self.cell_type = "inlineStr"
+        else:
+            self.cell_type = "s"
+            shared_strings.add(self._value)
 
-    @_set_value.register(bytes)
+    @_dispatch_value.register(bytes)
     def _set_bytes(self, value):
         self.cell_type = "inlineStr"
         self._value = value
 
-    @_set_value.register(Formula)
+    @_dispatch_value.register(Formula)
     def _set_formula(self, value):
         self.cell_type = 'str'
         if value.shared:
             value = value.share(self)
         self._value = value
 
-    @_set_value.register(type(None))
+    @_dispatch_value.register(type(None))
     def _set_none(self, value):
         self._value = value
 
-    # Implementation of DATEVALUE to meet the requirements
-    # described in 3.17.4.1 of the OOXML spec part 4
-    #
-    # For 1900 based sytems:
-    #
-    # DATEVALUE("01-Jan-1900") results in the serial value 1.0000000...
-    # DATEVALUE("03-Feb-1910") results in the serial value 3687.0000000...
-    # DATEVALUE("01-Feb-2006") results in the serial value 38749.0000000...
-    # DATEVALUE("31-Dec-9999") results in the serial value 2958465.0000000...
-    #
-    # Furthermore:
-    #
-    # DATEVALUE("28-Feb-1900") results in 59
-    # DATEVALUE("01-Mar-1900") results in 61
-    #
-    # For 1904 based systems:
-    #
-    # DATEVALUE("01-Jan-1904") results in the serial value 0.0000000...
-    # DATEVALUE("03-Feb-1910") results in the serial value 2225.0000000...
-    # DATEVALUE("01-Feb-2006") results in the serial value 37287.0000000...
-    # DATEVALUE("31-Dec-9999") results in the serial value 2957003.0000000...
-    #
+    # DATEVALUE and TIMEVALUE are implemented in xlsxcessive.dates
     def _serialize_date(self, dateobj):
-        base = self._date_base()
-        if base == 1900:
-            if dateobj < datetime.date(1900, 3, 1):
-                delta = datetime.date(base, 1, 1) - datetime.timedelta(days=1)
-            else:
-                delta = datetime.date(base, 1, 1) - datetime.timedelta(days=2)
-        elif base == 1904:
-            delta = datetime.date(base, 1, 1)
-        else:
-            raise UnsupportedDateBase('Date base must be either 1900 or 1904')
-        return (dateobj - delta).days
-
-    # Implementation of TIMEVALUE
-    #
-    # see OOXML spec part 4: 3.17.4.2 Time Representation
-    #
-    # TIMEVALUE("00:00:00") results in the serial value 0.0000000...
-    # TIMEVALUE("00:00:01") results in the serial value 0.0000115...
-    # TIMEVALUE("10:05:54") results in the serial value 0.4207639...
-    # TIMEVALUE("12:00:00") results in the serial value 0.5000000...
-    # TIMEVALUE("23:59:59") results in the serial value 0.9999884...
-    #
+        return self._date_serializer().date(dateobj)
+
     def _serialize_time(self, timeobj):
-        # calculate number of seconds since 00:00:00
-        seconds = timeobj.second + timeobj.minute * 60 + timeobj.hour * 60 * 60
-        return seconds / 86400
+        return self._date_serializer().time(timeobj)
 
-    # combination of DATEVALUE and TIMEVALUE
-    def _serialize_datetime(self, datetimeobj, base=1900):
-        date_float = float(self._serialize_date(datetimeobj.date(), base))
-        time_float = self._serialize_time(datetimeobj.time())
-        return date_float + time_float
+    def _serialize_datetime(self, datetimeobj):
+        return self._date_serializer().datetime(datetimeobj)
 
     def _format_value(self):
         if self.cell_type == 'inlineStr':
             return "<is><t>%s</t></is>" % self.value
+        elif self.cell_type == 's':
+            return "<v>%d</v>" % self._shared_strings().index[self.value]
         elif self.cell_type == 'n':
             return "<v>%s</v>" % self.value
         elif self.cell_type == 'str':
@@ -430,8 +1479,8 @@ class Cell:
             'r="%s"' % self.reference,
             't="%s"' % self.cell_type,
         ]
-        if self.format:
-            attrs.append('s="%d"' % self.format.index)
+        if self._format:
+            attrs.append('s="%d"' % self._format.index)
         # if we don't have an explicit format and the
         # value is a date, datetime or time
         # then try to apply a default format to the cell
@@ -447,10 +1496,20 @@ class Cell:
                 attrs.append('s="%d"' % idx)
         return '<c %s>%s</c>' % (" ".join(attrs), self._format_value())
 
+    def _write_xml(self, out):
+        out.write(str(self))
+
     @property
     def reference(self):
         return self._reference
 
+    @property
+    def column(self):
+        """The 0-based column index of the reference of this Cell."""
+        if self._column is None:
+            self._column = a1_to_coords(self._reference)[1]
+        return self._column
+
     class Coords:
         def __get__(self, instance, other):
             if instance._coords:
@@ -464,21 +1523,94 @@ class Cell:
     coords = Coords()
 
     def _coords_to_a1(self):
-        return _coords_to_a1_helper(self._coords)
+        return coords_to_a1(self._coords)
 
     def _a1_to_coords(self):
-        def _p():
-            i = 0
-            while True:
-                yield 26**i
-                i += 1
-
-        row = int(''.join(filter(str.isdigit, self._reference))) - 1
-        col_ref = ''.join(filter(str.isupper, self._reference))
-        col = 0
-        mod = 0
-        for p, letter in zip(_p(), reversed(col_ref)):
-            charval = string.ascii_uppercase.index(letter)
-            col += p * (charval + mod)
-            mod = 1
-        return row, col
+        return a1_to_coords(self._reference)
+
+
+# The setters of the common value types, looked up by exact type before
+# falling back to Cell._dispatch_value
+_VALUE_SETTERS = {
+    cls: vars(Cell)['_dispatch_value'].dispatcher.dispatch(cls)
+    for cls in (
+        int,
+        float,
+        bool,
+        decimal.Decimal,
+        str,
+        bytes,
+        datetime.date,
+        datetime.datetime,
+        datetime.time,
+        Formula,
+        type(None),
+    )
+}
+
+
+def _value_bytes(value):
+    if isinstance(value, Formula):
+        # counted with the formulas of the worksheet
+        return 0
+    return memory.sizeof(value)
+
+
+def _cell_bytes(cell):
+    size = sys.getsizeof(cell) + sys.getsizeof(cell._reference)
+    size += _value_bytes(cell._value)
+    if cell._coords is not None:
+        size += sys.getsizeof(cell._coords)
+    return size
+
+
+def _object_bytes(obj):
+    return _cell_bytes(obj) if isinstance(obj, Cell) else _value_bytes(obj)
+
+
+def _formula_bytes(formula):
+    size = sys.getsizeof(formula) + sys.getsizeof(formula.__dict__)
+    size += memory.sizeof(formula.source) + memory.sizeof(formula.bounds)
+    if formula._dependent is not None:
+        size += sys.getsizeof(formula._dependent)
+        size += sys.getsizeof(formula._dependent.__dict__)
+    return size
+
+
+def _measure_cell_bytes(count=1000):
+    """The typical bytes added by a Cell in a Row, but for its value."""
+    row = Row(None, 1)
+    empty = row._overhead_bytes()
+    for col in range(count):
+        row.add_cell(Cell(coords=(99999, col)))
+    return (row._overhead_bytes() - empty + row._cell_bytes()) // count
+
+
+def _measure_row_bytes(count=1000):
+    """The typical bytes added by a Row in a Worksheet, but for its cells."""
+    sheet = Worksheet(None, 'measure', None, None)
+    empty = sys.getsizeof(sheet.rows) + sys.getsizeof(sheet.row_map)
+    for number in range(1, count + 1):
+        sheet.row(number)
+    return (sheet.memory_usage(deep=True).rows - empty) // count
+
+
+def _measure_store_bytes(cells=4):
+    """The typical bytes held by the CellStore of a short Row, but for the
+    bytes of each cell.
+    """
+    row = Row(None, 1)
+    row._pack([0.0] * cells, None)
+    return row._overhead_bytes() + row._cell_bytes() - Row(None, 1)._overhead_bytes()
+
+
+# Estimates used to keep track of the memory held by budgeted workbooks
+_CELL_BYTES = _measure_cell_bytes()
+_ROW_BYTES = _measure_row_bytes()
+_store = _CellStore()
+_PACKED_BYTES = sum(
+    column.itemsize
+    for column in (_store.cols, _store.types, _store.styles, _store.numbers)
+)
+del _store
+_STORE_BYTES = _measure_store_bytes() - 4 * _PACKED_BYTES
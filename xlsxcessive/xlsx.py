@@ -1,25 +1,252 @@
-from xlsxcessive.parts import WorkbookPart, WorksheetPart, StylesPart
-from openpack.officepack import OfficePackage
+import concurrent.futures
+import functools
+import io
+import multiprocessing
+import threading
 
+from xlsxcessive.package import Package
+from xlsxcessive.parts import (
+    SharedStringsPart,
+    StylesPart,
+    WorkbookPart,
+    WorksheetPart,
+)
+from xlsxcessive.stats import SaveStats
+from xlsxcessive.stats import active as active_stats
+from xlsxcessive.worksheet import SpillingWorksheet, StreamingWorksheet
+from xlsxcessive.zipwriter import ZIP64_THRESHOLD, ZIP_DEFLATED
 
-def save(workbook, filename, stream=None):
+# How many times its estimated memory the XML of an in-memory worksheet
+# may take at most, escaped inline strings included
+_XML_EXPANSION = 8
+
+
+def save(
+    workbook,
+    filename,
+    stream=None,
+    workers=None,
+    pool='process',
+    compression=ZIP_DEFLATED,
+    compresslevel=None,
+    compress_threads=None,
+    stats=None,
+):
     """Save the given workbook with the given filename.
 
     If stream is provided and is a file-like object the .xlsx data
     will be written there instead.
+
+    Each part is written straight into its zip entry, worksheets a batch
+    of rows at a time.
+
+    If workers is given, up to that many worksheets are rendered at once
+    in a pool of worker processes (or threads, if pool is 'thread'); the
+    results are written to the package in sheet order, so the output is
+    the same as that of a serial save. Worker processes are forked and
+    share the workbook with this process; where fork isn't available, or
+    other threads are running (forking them is unsafe), a thread pool is
+    used instead. Streaming worksheets are always written by this process.
+
+    compression (zipfile.ZIP_DEFLATED or zipfile.ZIP_STORED) and
+    compresslevel trade file size for speed. Large parts are deflated in
+    chunks on up to compress_threads threads (by default, one per CPU).
+
+    stats is an optional SaveStats (see xlsxcessive.stats) to collect the
+    timings and counters of this save into, or a callable to pass them to
+    when it is done.
+
+    Workbooks created with cache_parts=True keep the compressed parts of
+    this save; the next save with the same compression settings copies
+    the parts that haven't changed instead of rendering them again.
     """
-    pack = OfficePackage()
-    wbp = WorkbookPart(pack, '/workbook.xml', data=str(workbook))
-    pack.add(wbp)
+    target = stream or filename
+    options = (workers, pool, compression, compresslevel, compress_threads)
+    if stats is None:
+        _save(workbook, target, *options)
+        return
+    collected = stats if isinstance(stats, SaveStats) else SaveStats()
+    with collected.collecting():
+        with collected.phase('count'):
+            _count_cells(workbook, collected)
+        with collected.phase('package'):
+            _save(workbook, target, *options)
+    if collected is not stats:
+        stats(collected)
+
+
+def _count_cells(workbook, stats):
+    for worksheet in workbook.sheets:
+        counts = worksheet._cell_counts()
+        stats.sheet(worksheet.name, rows=worksheet._row_count(), cells=dict(counts))
+
+
+def _save(workbook, target, workers, pool, compression, compresslevel, threads):
+    def cache(obj):
+        # Parts prepared ahead (by a WorkbookTemplate) are reused regardless.
+        cache = obj._part_cache
+        if workbook.cache_parts or cache.valid(compression, compresslevel):
+            return cache
+        return None
+
+    pack = Package()
+    wbp = pack.add(WorkbookPart, '/workbook.xml', workbook.render_to)
     pack.relate(wbp)
 
-    stp = StylesPart(pack, '/styles.xml', data=str(workbook.stylesheet))
-    pack.add(stp)
+    stylesheet = workbook.stylesheet
+    stp = pack.add(
+        StylesPart, '/styles.xml', stylesheet.render_to, cache=cache(stylesheet)
+    )
     wbp.relate(stp)
 
-    for i, worksheet in enumerate(workbook.sheets):
-        wid = i + 1
-        wsp = WorksheetPart(pack, "/worksheet%d.xml" % wid, data=str(worksheet))
-        pack.add(wsp)
-        wbp.relate(wsp, id=worksheet.relation_id)
-    pack.save(stream or filename)
+    if workbook.shared_strings is not None:
+        ssp = pack.add(
+            SharedStringsPart,
+            '/sharedStrings.xml',
+            workbook.shared_strings.render_to,
+            cache=cache(workbook.shared_strings),
+        )
+        wbp.relate(ssp)
+
+    # The worksheets whose content is reused from the last save
+    reused = set()
+    if workbook.cache_parts:
+        stats = active_stats()
+        for i, worksheet in enumerate(workbook.sheets):
+            if worksheet._part_cache.valid(compression, compresslevel):
+                reused.add(i)
+                stats.sheet(worksheet.name, reused=True)
+
+    with _SheetRenderer(workbook, workers, pool, reused) as renderer:
+        for i, worksheet in enumerate(workbook.sheets):
+            wid = i + 1
+            name = "/worksheet%d.xml" % wid
+            wsp = pack.add(
+                WorksheetPart,
+                name,
+                renderer.writer(i),
+                stream=functools.partial(renderer.needs_zip64, i),
+                cache=cache(worksheet),
+            )
+            wbp.relate(wsp, id=worksheet.relation_id)
+        pack.save(target, compression, compresslevel, threads)
+
+
+def _can_fork():
+    """Whether worker processes can be forked safely: only a process
+    running a single thread can be.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return False
+    return threading.active_count() == 1
+
+
+# The workbook being saved, in forked worker processes
+_worker_workbook = None
+
+
+def _init_worker(workbook):
+    global _worker_workbook
+    _worker_workbook = workbook
+
+
+def _render_in_worker(index):
+    return _render(_worker_workbook.sheets[index])
+
+
+def _render(worksheet):
+    buffer = io.BytesIO()
+    worksheet.write(buffer)
+    return buffer.getvalue()
+
+
+class _SheetRenderer:
+    """Provides the writers of the worksheet parts of a workbook.
+
+    Without workers, each worksheet writes itself into its part. With
+    workers, worksheets are rendered in a pool, a few ahead of the one
+    being written so that finished sheets don't pile up in memory. The
+    worksheets in reused are written from their PartCache and not rendered.
+    """
+
+    def __init__(self, workbook, workers, pool, reused=()):
+        self.workbook = workbook
+        self.workers = workers
+        self.executor = None
+        self.futures = {}
+        # Indexes of the worksheets rendered by the pool, in sheet order
+        self.queue = [
+            i
+            for i, sheet in enumerate(workbook.sheets)
+            if not isinstance(sheet, StreamingWorksheet) and i not in reused
+        ]
+        if workers and len(self.queue) > 1:
+            # Resolve the style indexes before the workers get a copy.
+            workbook.stylesheet._intern_formats()
+            self.executor = self._executor(pool)
+
+    def _executor(self, pool):
+        if pool not in ('process', 'thread'):
+            raise ValueError("Unknown pool: %r" % pool)
+        if pool == 'process' and _can_fork():
+            self.render = _render_in_worker
+            executor = concurrent.futures.ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_init_worker,
+                initargs=(self.workbook,),
+            )
+            # Fork the workers now, before the package is written and its
+            # compression threads start.
+            executor.submit(int).result()
+            return executor
+        self.render = lambda index: _render(self.workbook.sheets[index])
+        return concurrent.futures.ThreadPoolExecutor(self.workers)
+
+    def writer(self, index):
+        worksheet = self.workbook.sheets[index]
+        if self.executor is None or index not in self.queue:
+            return worksheet.write
+
+        def write(stream):
+            stats = active_stats()
+            with stats.phase('worksheet'):
+                self._submit_through(index)
+                data = self.futures.pop(index).result()
+            stream.write(data)
+            stats.sheet(worksheet.name, bytes=len(data))
+
+        return write
+
+    def needs_zip64(self, index):
+        """Whether the part of a worksheet needs ZIP64 sizes.
+
+        Older Excel versions report entries with ZIP64 sizes as damaged, so
+        they are only used by parts that may grow past 4 GiB.
+        """
+        worksheet = self.workbook.sheets[index]
+        if isinstance(worksheet, (StreamingWorksheet, SpillingWorksheet)):
+            # Rows kept on disk can add up to any size.
+            return True
+        if self.executor is not None and index in self.queue:
+            with active_stats().phase('worksheet'):
+                self._submit_through(index)
+                data = self.futures[index].result()
+            return len(data) >= ZIP64_THRESHOLD
+        estimate = worksheet.memory_usage().total * _XML_EXPANSION
+        return estimate >= ZIP64_THRESHOLD
+
+    def _submit_through(self, index):
+        position = self.queue.index(index)
+        for ahead in self.queue[: position + self.workers]:
+            if ahead not in self.futures and ahead >= index:
+                self.futures[ahead] = self.executor.submit(self.render, ahead)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            for future in self.futures.values():
+                future.cancel()
+            self.executor.shutdown()
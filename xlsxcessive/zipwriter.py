@@ -0,0 +1,443 @@
+"""A write-only zip archive writer that deflates entries on a thread pool.
+
+Entries are written in order, each either in one piece (``write_entry``)
+or through a file-like object (``open_entry``). The data of the latter is
+cut into chunks which are deflated concurrently - zlib releases the GIL -
+and written out in order. Each chunk is compressed as a separate raw
+deflate stream, primed with the last 32 KiB of the chunk before it and
+ended with a sync flush, so that the concatenated chunks form a single
+valid deflate stream (the technique used by pigz). Sizes and checksums of
+such entries follow their data in data descriptors, so the target doesn't
+need to be seekable.
+
+>>> import io, zipfile
+>>> buffer = io.BytesIO()
+>>> with ZipWriter(buffer) as archive:
+...     archive.write_entry('hello.txt', b'Hello')
+...     with archive.open_entry('numbers.txt') as entry:
+...         n = entry.write(b'1 2 3 ' * 100000)
+>>> zipfile.ZipFile(buffer).read('numbers.txt')[:12]
+b'1 2 3 1 2 3 '
+"""
+
+import collections
+import concurrent.futures
+import os
+import struct
+import time
+import zlib
+from typing import NamedTuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED
+
+from xlsxcessive.stats import active as active_stats
+
+# Bytes of uncompressed data per concurrently deflated chunk
+CHUNK_SIZE = 2**18
+
+# The size of the deflate window, primed from the previous chunk
+_WINDOW = 2**15
+
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_DATA_DESCRIPTOR = struct.Struct('<4sL2L')
+_DATA_DESCRIPTOR64 = struct.Struct('<4sL2Q')
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_END_RECORD = struct.Struct('<4s4H2LH')
+_END_RECORD64 = struct.Struct('<4sQ2H2L4Q')
+_END_LOCATOR64 = struct.Struct('<4sLQL')
+_ZIP64_EXTRA = 0x0001
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_SYSUNIX = 3
+_USER_READ_WRITE = 0o600 << 16
+
+# Entries of this many bytes or more should be opened with force_zip64;
+# the margin leaves room for deflate to grow incompressible data
+ZIP64_THRESHOLD = _ZIP64_LIMIT - 2**24
+
+
+class CompressedEntry(NamedTuple):
+    """The content of an entry as written, to be written again by
+    write_compressed."""
+
+    crc: int
+    size: int
+    data: bytes
+
+
+class _Entry:
+    __slots__ = (
+        'name',
+        'flags',
+        'method',
+        'crc',
+        'compressed_size',
+        'size',
+        'offset',
+        'zip64',
+    )
+
+    def __init__(self, name, flags, method, offset, zip64):
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.offset = offset
+        self.zip64 = zip64
+        self.crc = 0
+        self.compressed_size = 0
+        self.size = 0
+
+
+class ZipWriter:
+    """Write a zip archive to target, a filename or binary file-like object.
+
+    compression is ZIP_DEFLATED or ZIP_STORED; compresslevel is a zlib
+    level. Chunks of entries written through open_entry are deflated by
+    up to threads threads (by default, one per CPU).
+    """
+
+    def __init__(
+        self,
+        target,
+        compression=ZIP_DEFLATED,
+        compresslevel=None,
+        threads=None,
+        chunk_size=CHUNK_SIZE,
+    ):
+        if compression not in (ZIP_DEFLATED, ZIP_STORED):
+            raise ValueError("Unsupported compression method: %r" % compression)
+        if isinstance(target, (str, os.PathLike)):
+            self.fp = open(target, 'wb')
+            self._close_fp = True
+        else:
+            self.fp = target
+            self._close_fp = False
+        self.compression = compression
+        self.compresslevel = -1 if compresslevel is None else compresslevel
+        self.threads = threads or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.entries = []
+        self.position = 0
+        self._executor = None
+        self.stats = active_stats()
+        now = time.localtime(time.time())
+        self._dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+        self._dos_date = ((now.tm_year - 1980) << 9) | (now.tm_mon << 5) | now.tm_mday
+
+    def _write(self, data):
+        self.fp.write(data)
+        self.position += len(data)
+
+    def _start_entry(self, name, flags, zip64, crc=0, compressed_size=0, size=0):
+        encoded = name.encode('utf-8')
+        if not encoded.isascii():
+            flags |= _FLAG_UTF8
+        entry = _Entry(encoded, flags, self.compression, self.position, zip64)
+        extra = b''
+        if zip64:
+            extra = struct.pack('<2H2Q', _ZIP64_EXTRA, 16, size, compressed_size)
+            size = compressed_size = _ZIP64_LIMIT
+        self._write(
+            _LOCAL_HEADER.pack(
+                b'PK\x03\x04',
+                _VERSION_ZIP64 if zip64 else _VERSION,
+                flags,
+                entry.method,
+                self._dos_time,
+                self._dos_date,
+                crc,
+                compressed_size,
+                size,
+                len(encoded),
+                len(extra),
+            )
+        )
+        self._write(encoded)
+        self._write(extra)
+        self.entries.append(entry)
+        return entry
+
+    def write_entry(self, name, data):
+        """Write an entry with the bytes data."""
+        with self.stats.phase('zip'):
+            self._write_entry(name, data)
+
+    def _write_entry(self, name, data):
+        crc = zlib.crc32(data)
+        if self.compression == ZIP_DEFLATED:
+            compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+        else:
+            compressed = data
+        zip64 = max(len(data), len(compressed)) > _ZIP64_LIMIT
+        entry = self._start_entry(name, 0, zip64, crc, len(compressed), len(data))
+        self._write(compressed)
+        entry.crc = crc
+        entry.compressed_size = len(compressed)
+        entry.size = len(data)
+
+    def open_entry(self, name, force_zip64=False, capture=False):
+        """Return a binary file-like object writing an entry.
+
+        Entries that may exceed 4 GiB must be opened with force_zip64. If
+        capture is True, the compressed data is kept; once the entry is
+        closed, the compressed() method of the file-like object returns a
+        CompressedEntry to pass to write_compressed.
+        """
+        entry = self._start_entry(name, _FLAG_DATA_DESCRIPTOR, force_zip64)
+        return _EntryWriter(self, entry, capture)
+
+    def write_compressed(self, name, compressed, force_zip64=False):
+        """Write an entry with the CompressedEntry of an earlier one.
+
+        The data is written as it is, so it must have been compressed with
+        the compression of this archive. ZIP64 sizes are used when the
+        entry needs them, or if force_zip64 is True.
+        """
+        with self.stats.phase('zip'):
+            size = max(compressed.size, len(compressed.data))
+            zip64 = force_zip64 or size > _ZIP64_LIMIT
+            entry = self._start_entry(name, _FLAG_DATA_DESCRIPTOR, zip64)
+            self._write(compressed.data)
+            entry.crc = compressed.crc
+            entry.compressed_size = len(compressed.data)
+            entry.size = compressed.size
+            self._finish_entry(entry)
+
+    def _deflate(self, data, dictionary):
+        if self.threads == 1:
+            future = concurrent.futures.Future()
+            future.set_result(_deflate_chunk(data, dictionary, self.compresslevel))
+            return future
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.threads)
+        return self._executor.submit(
+            _deflate_chunk, data, dictionary, self.compresslevel
+        )
+
+    def _finish_entry(self, entry):
+        if entry.zip64:
+            descriptor = _DATA_DESCRIPTOR64
+        elif max(entry.size, entry.compressed_size) > _ZIP64_LIMIT:
+            raise RuntimeError(
+                "Entry %r exceeds 4 GiB; open it with force_zip64" % entry.name
+            )
+        else:
+            descriptor = _DATA_DESCRIPTOR
+        self._write(
+            descriptor.pack(b'PK\x07\x08', entry.crc, entry.compressed_size, entry.size)
+        )
+
+    def close(self):
+        """Write the central directory and release the target."""
+        if self.fp is None:
+            return
+        try:
+            with self.stats.phase('zip'):
+                self._write_central_directory()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            if self._close_fp:
+                self.fp.close()
+            self.fp = None
+
+    def abort(self):
+        """Release the target without finishing the archive.
+
+        Called instead of close() when writing the archive fails. A file
+        opened from a filename is removed rather than left truncated.
+        """
+        if self.fp is None:
+            return
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        if self._close_fp:
+            self.fp.close()
+            os.remove(self.fp.name)
+        self.fp = None
+
+    def _write_central_directory(self):
+        start = self.position
+        for entry in self.entries:
+            values = []
+            size, compressed_size, offset = (
+                entry.size,
+                entry.compressed_size,
+                entry.offset,
+            )
+            if size > _ZIP64_LIMIT:
+                values.append(size)
+                size = _ZIP64_LIMIT
+            if compressed_size > _ZIP64_LIMIT:
+                values.append(compressed_size)
+                compressed_size = _ZIP64_LIMIT
+            if offset > _ZIP64_LIMIT:
+                values.append(offset)
+                offset = _ZIP64_LIMIT
+            extra = b''
+            if values:
+                extra = struct.pack(
+                    '<2H%dQ' % len(values), _ZIP64_EXTRA, 8 * len(values), *values
+                )
+            version = _VERSION_ZIP64 if (values or entry.zip64) else _VERSION
+            self._write(
+                _CENTRAL_HEADER.pack(
+                    b'PK\x01\x02',
+                    (_SYSUNIX << 8) | version,
+                    version,
+                    entry.flags,
+                    entry.method,
+                    self._dos_time,
+                    self._dos_date,
+                    entry.crc,
+                    compressed_size,
+                    size,
+                    len(entry.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    _USER_READ_WRITE,
+                    offset,
+                )
+            )
+            self._write(entry.name)
+            self._write(extra)
+        end = self.position
+        count, length = len(self.entries), end - start
+        if count > _ZIP64_COUNT_LIMIT or length > _ZIP64_LIMIT or start > _ZIP64_LIMIT:
+            self._write(
+                _END_RECORD64.pack(
+                    b'PK\x06\x06',
+                    _END_RECORD64.size - 12,
+                    _VERSION_ZIP64,
+                    _VERSION_ZIP64,
+                    0,
+                    0,
+                    count,
+                    count,
+                    length,
+                    start,
+                )
+            )
+            self._write(_END_LOCATOR64.pack(b'PK\x06\x07', 0, end, 1))
+            count = min(count, _ZIP64_COUNT_LIMIT)
+            length = min(length, _ZIP64_LIMIT)
+            start = min(start, _ZIP64_LIMIT)
+        self._write(
+            _END_RECORD.pack(b'PK\x05\x06', 0, 0, count, count, length, start, 0)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _deflate_chunk(data, dictionary, level):
+    """Deflate data into a raw, sync flushed, non-final deflate stream."""
+    if dictionary:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -15, zlib.DEF_MEM_LEVEL, 0, dictionary
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+# An empty final deflate block, ending a stream of sync flushed chunks
+_FINAL_BLOCK = zlib.compressobj(6, zlib.DEFLATED, -15).flush()
+
+
+class _EntryWriter:
+    """The file-like object returned by ZipWriter.open_entry."""
+
+    def __init__(self, archive, entry, capture=False):
+        self.archive = archive
+        self.entry = entry
+        # The compressed data written, if captured
+        self.captured = [] if capture else None
+        self.buffer = []
+        self.buffered = 0
+        self.dictionary = b''
+        # Deflated chunks in the making, in order
+        self.pending = collections.deque()
+        self.closed = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        with self.archive.stats.phase('zip'):
+            return self._write(data)
+
+    def _write(self, data):
+        self.entry.crc = zlib.crc32(data, self.entry.crc)
+        self.entry.size += len(data)
+        if self.archive.compression == ZIP_STORED:
+            self._output(data)
+            return len(data)
+        self.buffer.append(bytes(data))
+        self.buffered += len(data)
+        if self.buffered >= self.archive.chunk_size:
+            self._submit()
+        return len(data)
+
+    def _submit(self):
+        chunk = b''.join(self.buffer)
+        self.buffer.clear()
+        self.buffered = 0
+        self.pending.append(self.archive._deflate(chunk, self.dictionary))
+        self.dictionary = chunk[-_WINDOW:]
+        # Keep a bounded number of chunks in flight.
+        while len(self.pending) > 2 * self.archive.threads:
+            self._output(self.pending.popleft().result())
+
+    def _output(self, data):
+        self.archive._write(data)
+        self.entry.compressed_size += len(data)
+        if self.captured is not None:
+            self.captured.append(data)
+
+    def compressed(self):
+        """Return the CompressedEntry of the closed, captured entry."""
+        return CompressedEntry(self.entry.crc, self.entry.size, b''.join(self.captured))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        with self.archive.stats.phase('zip'):
+            self._finish()
+
+    def _finish(self):
+        if self.archive.compression == ZIP_DEFLATED:
+            if self.buffer and not self.pending:
+                # Too little data to be worth a trip to the thread pool
+                data = b''.join(self.buffer)
+                self._output(_deflate_chunk(data, b'', self.archive.compresslevel))
+            elif self.buffer:
+                self._submit()
+            while self.pending:
+                self._output(self.pending.popleft().result())
+            self._output(_FINAL_BLOCK)
+        self.archive._finish_entry(self.entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            # The archive is aborted; don't wait for pending chunks.
+            self.closed = True